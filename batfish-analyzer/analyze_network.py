@@ -2,415 +2,653 @@
 """
 Comprehensive Batfish Network Analysis - 11 Security & Compliance Checks
 """
+import argparse
+import hashlib
 import pandas as pd
 from pathlib import Path
 from pybatfish.client.session import Session
 from datetime import datetime
-import json
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+
+from fhrp_utils import add_host_cols, audit_fhrp, cast_flags, summarize_fhrp
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 LAB_DIR = SCRIPT_DIR.parent
 SNAPSHOT_PATH = str(LAB_DIR / "snapshot")
 OUTPUT_DIR = str(SCRIPT_DIR / "output")
+CACHE_DIR = Path(OUTPUT_DIR) / ".cache"
+SNAPSHOT_NAME = "snapshot"
+# Content key of the configs the Batfish snapshot was last built from
+SNAPSHOT_KEY_FILE = CACHE_DIR / "snapshot.key"
+
+# Questions answered up front for Checks 1-10 (result key -> bf.q question)
+QUERIES = {
+    "hsrp": "hsrpProperties",
+    "vrrp": "vrrpProperties",
+    "interfaces": "interfaceProperties",
+    "bgp_process": "bgpProcessConfiguration",
+    "bgp_peers": "bgpPeerConfiguration",
+    "routes": "routes",
+    "acl": "filterLineReachability",
+    "unused": "unusedStructures",
+    "ospf_process": "ospfProcessConfiguration",
+    "ospf_interfaces": "ospfInterfaceConfiguration",
+    "defined": "definedStructures",
+}
+FHRP_QUERIES = ("hsrp", "vrrp")
+
+# One timestamp per run so every output file shares the same suffix
+RUN_TS = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+# (DataFrame, path) pairs written in one batch once all checks have run
+PENDING_WRITES = []
 
 # Initialize Batfish
 bf = Session(host="localhost")
 
 
 def save_csv(df, name):
-    """Save DataFrame to timestamped CSV"""
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = f"{OUTPUT_DIR}/{name}_{ts}.csv"
-    df.to_csv(path, index=False)
-    print(f"[+] Saved: {path}")
+    """Queue DataFrame for a timestamped CSV write (see flush_writes)"""
+    path = f"{OUTPUT_DIR}/{name}_{RUN_TS}.csv"
+    PENDING_WRITES.append((df, path))
     return path
 
 
-def extract_hostname(interface_obj):
-    """Extract hostname from Batfish interface object"""
-    interface_str = str(interface_obj)
-    return interface_str.split("[")[0] if "[" in interface_str else interface_str
-
-
-def extract_interface_name(interface_obj):
-    """Extract interface name from Batfish interface object"""
-    interface_str = str(interface_obj)
-    if "[" in interface_str and "]" in interface_str:
-        return interface_str.split("[")[1].split("]")[0]
-    return ""
+def flush_writes():
+    """Write every queued CSV, overlapping the disk I/O in a thread pool"""
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        futures = [
+            ex.submit(df.to_csv, path, index=False) for df, path in PENDING_WRITES
+        ]
+    for (_, path), future in zip(PENDING_WRITES, futures):
+        try:
+            future.result()
+            print(f"[+] Saved: {path}")
+        except Exception as e:
+            print(f"✗ Write error ({path}): {e}")
+    PENDING_WRITES.clear()
+
+
+def snapshot_key():
+    """
+    Hash of every snapshot file's relative path, size and mtime
+
+    Adding, deleting, renaming or editing a config changes the key, even when
+    the newest mtime stays the same (deletes, copies that preserve mtimes).
+    """
+    root = Path(SNAPSHOT_PATH)
+    h = hashlib.blake2b(digest_size=8)
+    for path in sorted(f for f in root.rglob("*") if f.is_file()):
+        st = path.stat()
+        rel = path.relative_to(root).as_posix()
+        h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def cached_query(name, question, key):
+    """Answer a Batfish question, reusing the cached frame for an unchanged snapshot"""
+    path = CACHE_DIR / f"{name}_{key}.pkl"
+    if path.exists():
+        return pd.read_pickle(path)
+    df = question().answer().frame()
+    df.to_pickle(path)
+    return df
+
+
+def run_queries(keys, snapshot):
+    """Answer the given QUERIES concurrently, keeping errors per query"""
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = {
+            key: ex.submit(
+                cached_query, QUERIES[key], getattr(bf.q, QUERIES[key]), snapshot
+            )
+            for key in keys
+        }
+    results = {}
+    for key, future in futures.items():
+        try:
+            # Parse host[iface] and cast flags once here rather than in every check
+            results[key] = cast_flags(add_host_cols(future.result()))
+        except Exception as e:
+            results[key] = e
+    return results
+
+
+def query_result(results, key):
+    """Return a prefetched frame, re-raising its query error inside the check"""
+    result = results[key]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def available_questions():
+    """Names of the questions this Batfish version exposes, probed once"""
+    return {name for name in dir(bf.q) if not name.startswith("_")}
+
+
+def connect():
+    """Open the Batfish snapshot for the current configs, returning its file key"""
+    print("[+] Connecting to Batfish...")
+    print(f"[+] Snapshot: {SNAPSHOT_PATH}")
+    print(f"[+] Output: {OUTPUT_DIR}")
+
+    # The snapshot and query cache are keyed by each config file's path, size
+    # and mtime so reruns against unchanged configs skip both Batfish parsing
+    # and the query round-trips
+    key = snapshot_key()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    built_from = SNAPSHOT_KEY_FILE.read_text() if SNAPSHOT_KEY_FILE.exists() else None
+
+    try:
+        bf.set_network("network-analysis")
+        if built_from == key and SNAPSHOT_NAME in bf.list_snapshots():
+            bf.set_snapshot(SNAPSHOT_NAME)
+        else:
+            bf.init_snapshot(SNAPSHOT_PATH, name=SNAPSHOT_NAME, overwrite=True)
+            SNAPSHOT_KEY_FILE.write_text(key)
+            prune_stale(key)
+        print("[+] ✓ Connected")
+    except Exception as e:
+        print(f"[!] Error: {e}")
+        exit(1)
+    return key
 
 
-print("[+] Connecting to Batfish...")
-print(f"[+] Snapshot: {SNAPSHOT_PATH}")
-print(f"[+] Output: {OUTPUT_DIR}")
+def prune_stale(key):
+    """Drop cached answers computed for other snapshot keys"""
+    for path in CACHE_DIR.glob("*.pkl"):
+        if not path.stem.endswith(f"_{key}"):
+            path.unlink()
 
-try:
-    bf.set_network("network-analysis")
-    bf.init_snapshot(SNAPSHOT_PATH, name="snapshot", overwrite=True)
-    print("[+] ✓ Connected")
-except Exception as e:
-    print(f"[!] Error: {e}")
-    exit(1)
 
 # ============================================================================
 # CHECK 1: FHRP COMPLIANCE
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 1: FHRP COMPLIANCE (HSRP/VRRP)")
-print("=" * 80)
-
-hsrp_sum = pd.DataFrame()
-try:
-    hsrp = bf.q.hsrpProperties().answer().frame()
-    if len(hsrp) > 0:
-        save_csv(hsrp, "hsrp_detailed")
-        hsrp_sum = hsrp.copy()
-        hsrp_sum["Protocol"] = "HSRP"
-        hsrp_sum["Hostname"] = hsrp_sum["Interface"].apply(extract_hostname)
-        print(f"✓ HSRP groups: {len(hsrp)}")
-except Exception as e:
-    print(f"✗ HSRP error: {e}")
-
-vrrp_sum = pd.DataFrame()
-try:
-    vrrp = bf.q.vrrpProperties().answer().frame()
-    if len(vrrp) > 0:
-        save_csv(vrrp, "vrrp_detailed")
-        vrrp_sum = vrrp.copy()
-        vrrp_sum["Protocol"] = "VRRP"
-        vrrp_sum["Hostname"] = vrrp_sum["Interface"].apply(extract_hostname)
-        print(f"✓ VRRP groups: {len(vrrp)}")
-except Exception as e:
-    print(f"✗ VRRP error: {e}")
-
-if len(hsrp_sum) > 0 or len(vrrp_sum) > 0:
-    fhrp = pd.concat([hsrp_sum, vrrp_sum], ignore_index=True)
-    save_csv(fhrp, "fhrp_unified")
+def check_fhrp(results):
+    """CHECK 1: FHRP compliance across HSRP and VRRP"""
+    print("\n" + "=" * 80)
+    print("CHECK 1: FHRP COMPLIANCE (HSRP/VRRP)")
+    print("=" * 80)
+
+    hsrp_sum = pd.DataFrame()
+    try:
+        hsrp = query_result(results, "hsrp")
+        n_hsrp = len(hsrp)
+        if n_hsrp:
+            save_csv(hsrp, "hsrp_detailed")
+            hsrp_sum = summarize_fhrp(hsrp, "HSRP")
+            print(f"✓ HSRP groups: {n_hsrp}")
+    except Exception as e:
+        print(f"✗ HSRP error: {e}")
+
+    vrrp_sum = pd.DataFrame()
+    try:
+        vrrp = query_result(results, "vrrp")
+        n_vrrp = len(vrrp)
+        if n_vrrp:
+            save_csv(vrrp, "vrrp_detailed")
+            vrrp_sum = summarize_fhrp(vrrp, "VRRP")
+            print(f"✓ VRRP groups: {n_vrrp}")
+    except Exception as e:
+        print(f"✗ VRRP error: {e}")
+
+    fhrp = pd.DataFrame()
+    if not (hsrp_sum.empty and vrrp_sum.empty):
+        fhrp = audit_fhrp(pd.concat([hsrp_sum, vrrp_sum], ignore_index=True))
+        save_csv(fhrp, "fhrp_unified")
+    return fhrp
+
 
 # ============================================================================
 # CHECK 2: INTERFACE SECURITY
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 2: INTERFACE SECURITY & DOCUMENTATION")
-print("=" * 80)
-
-interfaces = pd.DataFrame()
-no_desc = pd.DataFrame()
-try:
-    interfaces = bf.q.interfaceProperties().answer().frame()
-    if len(interfaces) > 0:
-        save_csv(interfaces, "interfaces_all")
-
-        # Check for descriptions
-        if "Description" in interfaces.columns:
-            no_desc = interfaces[
-                interfaces["Description"].isna() | (interfaces["Description"] == "")
-            ]
-            if len(no_desc) > 0:
-                print(f"⚠️  {len(no_desc)} interfaces without descriptions")
-                save_csv(no_desc, "interfaces_no_description")
+def check_interfaces(results):
+    """CHECK 2: interface descriptions and admin status"""
+    print("\n" + "=" * 80)
+    print("CHECK 2: INTERFACE SECURITY & DOCUMENTATION")
+    print("=" * 80)
+
+    interfaces = pd.DataFrame()
+    no_desc = pd.DataFrame()
+    try:
+        interfaces = query_result(results, "interfaces")
+        n_interfaces = len(interfaces)
+        if n_interfaces:
+            save_csv(interfaces, "interfaces_all")
+
+            # Check for descriptions
+            if "Description" in interfaces.columns:
+                no_desc = interfaces[interfaces["Description"].fillna("").eq("")]
+                n_no_desc = len(no_desc)
+                if n_no_desc:
+                    print(f"⚠️  {n_no_desc} interfaces without descriptions")
+                    save_csv(no_desc, "interfaces_no_description")
+                else:
+                    print(f"✓ All interfaces documented")
+
+            # Check active status - handle different column names
+            active_count = 0
+            if "Admin_Status" in interfaces.columns:
+                active = interfaces[interfaces["Admin_Status"] == "ACTIVE"]
+                active_count = len(active)
+            elif "Active" in interfaces.columns:
+                active = interfaces[interfaces["Active"].fillna(False)]
+                active_count = len(active)
             else:
-                print(f"✓ All interfaces documented")
-
-        # Check active status - handle different column names
-        active_count = 0
-        if "Admin_Status" in interfaces.columns:
-            active = interfaces[interfaces["Admin_Status"] == "ACTIVE"]
-            active_count = len(active)
-        elif "Active" in interfaces.columns:
-            active = interfaces[interfaces["Active"] == True]
-            active_count = len(active)
-        else:
-            active_count = len(interfaces)
+                active_count = n_interfaces
+
+            print(f"✓ Interfaces analyzed: {n_interfaces}")
+            print(f"  - Active: {active_count}")
 
-        print(f"✓ Interfaces analyzed: {len(interfaces)}")
-        print(f"  - Active: {active_count}")
+    except Exception as e:
+        print(f"✗ Interface error: {e}")
+    return interfaces, no_desc
 
-except Exception as e:
-    print(f"✗ Interface error: {e}")
 
 # ============================================================================
 # CHECK 3: BGP AUTHENTICATION
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 3: BGP AUTHENTICATION AUDIT")
-print("=" * 80)
-
-bgp_peers = pd.DataFrame()
-no_auth = pd.DataFrame()
-try:
-    bgp_process = bf.q.bgpProcessConfiguration().answer().frame()
-    if len(bgp_process) > 0:
-        save_csv(bgp_process, "bgp_process_config")
-        print(f"✓ BGP processes: {len(bgp_process)}")
-
-        bgp_peers = bf.q.bgpPeerConfiguration().answer().frame()
-        if len(bgp_peers) > 0:
-            save_csv(bgp_peers, "bgp_peers")
-
-            # Check for authentication - handle different column names
-            if "Password_Set" in bgp_peers.columns:
-                no_auth = bgp_peers[bgp_peers["Password_Set"] == False]
-                if len(no_auth) > 0:
-                    print(f"⚠️  {len(no_auth)} BGP peers without authentication")
-                    save_csv(no_auth, "bgp_peers_no_auth")
+def check_bgp(results):
+    """CHECK 3: BGP peer authentication"""
+    print("\n" + "=" * 80)
+    print("CHECK 3: BGP AUTHENTICATION AUDIT")
+    print("=" * 80)
+
+    bgp_peers = pd.DataFrame()
+    no_auth = pd.DataFrame()
+    try:
+        bgp_process = query_result(results, "bgp_process")
+        n_bgp_process = len(bgp_process)
+        if n_bgp_process:
+            save_csv(bgp_process, "bgp_process_config")
+            print(f"✓ BGP processes: {n_bgp_process}")
+
+            bgp_peers = query_result(results, "bgp_peers")
+            n_bgp_peers = len(bgp_peers)
+            if n_bgp_peers:
+                save_csv(bgp_peers, "bgp_peers")
+
+                # Check for authentication - handle different column names
+                if "Password_Set" in bgp_peers.columns:
+                    no_auth = bgp_peers[~bgp_peers["Password_Set"].fillna(True)]
+                    n_no_auth = len(no_auth)
+                    if n_no_auth:
+                        print(f"⚠️  {n_no_auth} BGP peers without authentication")
+                        save_csv(no_auth, "bgp_peers_no_auth")
+                    else:
+                        print(f"✓ All BGP peers authenticated")
+                elif "Auth_Type" in bgp_peers.columns:
+                    no_auth = bgp_peers[bgp_peers["Auth_Type"].isna()]
+                    n_no_auth = len(no_auth)
+                    if n_no_auth:
+                        print(f"⚠️  {n_no_auth} BGP peers without authentication")
+                        save_csv(no_auth, "bgp_peers_no_auth")
                 else:
-                    print(f"✓ All BGP peers authenticated")
-            elif "Auth_Type" in bgp_peers.columns:
-                no_auth = bgp_peers[bgp_peers["Auth_Type"].isna()]
-                if len(no_auth) > 0:
-                    print(f"⚠️  {len(no_auth)} BGP peers without authentication")
-                    save_csv(no_auth, "bgp_peers_no_auth")
-            else:
-                print(f"ℹ️  Cannot determine BGP authentication status")
+                    print(f"ℹ️  Cannot determine BGP authentication status")
+
+                print(f"✓ Total BGP peers: {n_bgp_peers}")
+        else:
+            print("ℹ️  No BGP configured")
+    except Exception as e:
+        print(f"✗ BGP error: {e}")
+    return bgp_peers, no_auth
 
-            print(f"✓ Total BGP peers: {len(bgp_peers)}")
-    else:
-        print("ℹ️  No BGP configured")
-except Exception as e:
-    print(f"✗ BGP error: {e}")
 
 # ============================================================================
 # CHECK 4: ROUTING TABLE
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 4: ROUTING TABLE ANALYSIS")
-print("=" * 80)
-
-routes = pd.DataFrame()
-try:
-    routes = bf.q.routes().answer().frame()
-    if len(routes) > 0:
-        save_csv(routes, "routing_table")
-
-        if "Protocol" in routes.columns:
-            route_counts = routes["Protocol"].value_counts()
-            print(f"✓ Total routes: {len(routes)}")
-            for protocol, count in route_counts.head(10).items():
-                print(f"  - {protocol}: {count}")
+def check_routes(results):
+    """CHECK 4: routing table protocol breakdown"""
+    print("\n" + "=" * 80)
+    print("CHECK 4: ROUTING TABLE ANALYSIS")
+    print("=" * 80)
+
+    routes = pd.DataFrame()
+    try:
+        # Arrow-backed columns: value_counts hashes in C++, not per PyObject
+        routes = query_result(results, "routes").convert_dtypes(
+            dtype_backend="pyarrow"
+        )
+        n_routes = len(routes)
+        if n_routes:
+            save_csv(routes, "routing_table")
+
+            if "Protocol" in routes.columns:
+                route_counts = routes["Protocol"].value_counts()
+                print(f"✓ Total routes: {n_routes}")
+                for protocol, count in route_counts.head(10).items():
+                    print(f"  - {protocol}: {count}")
+            else:
+                print(f"✓ Total routes: {n_routes}")
         else:
-            print(f"✓ Total routes: {len(routes)}")
-    else:
-        print("ℹ️  No routes")
-except Exception as e:
-    print(f"✗ Routing error: {e}")
+            print("ℹ️  No routes")
+    except Exception as e:
+        print(f"✗ Routing error: {e}")
+    return routes
+
 
 # ============================================================================
 # CHECK 5: ACL DEAD RULES
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 5: ACL DEAD RULE DETECTION")
-print("=" * 80)
-
-acl_lines = pd.DataFrame()
-unreachable = pd.DataFrame()
-try:
-    acl_lines = bf.q.filterLineReachability().answer().frame()
-    if len(acl_lines) > 0:
-        save_csv(acl_lines, "acl_reachability")
-
-        if "Unreachable" in acl_lines.columns:
-            unreachable = acl_lines[acl_lines["Unreachable"] == True]
-            if len(unreachable) > 0:
-                print(f"⚠️  {len(unreachable)} dead ACL rules")
-                save_csv(unreachable, "acl_dead_rules")
-            else:
-                print(f"✓ No dead rules")
+def check_acls(results):
+    """CHECK 5: unreachable (dead) ACL lines"""
+    print("\n" + "=" * 80)
+    print("CHECK 5: ACL DEAD RULE DETECTION")
+    print("=" * 80)
+
+    acl_lines = pd.DataFrame()
+    unreachable = pd.DataFrame()
+    try:
+        acl_lines = query_result(results, "acl")
+        n_acl_lines = len(acl_lines)
+        if n_acl_lines:
+            save_csv(acl_lines, "acl_reachability")
+
+            if "Unreachable" in acl_lines.columns:
+                unreachable = acl_lines[acl_lines["Unreachable"].fillna(False)]
+                n_unreachable = len(unreachable)
+                if n_unreachable:
+                    print(f"⚠️  {n_unreachable} dead ACL rules")
+                    save_csv(unreachable, "acl_dead_rules")
+                else:
+                    print(f"✓ No dead rules")
+
+            print(f"✓ ACL lines analyzed: {n_acl_lines}")
+        else:
+            print("ℹ️  No ACLs found")
+    except Exception as e:
+        print(f"✗ ACL error: {e}")
+    return acl_lines, unreachable
 
-        print(f"✓ ACL lines analyzed: {len(acl_lines)}")
-    else:
-        print("ℹ️  No ACLs found")
-except Exception as e:
-    print(f"✗ ACL error: {e}")
 
 # ============================================================================
 # CHECK 6: UNUSED STRUCTURES
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 6: UNUSED STRUCTURES (Cleanup Candidates)")
-print("=" * 80)
-
-unused_structures = pd.DataFrame()
-try:
-    unused_structures = bf.q.unusedStructures().answer().frame()
-    if len(unused_structures) > 0:
-        save_csv(unused_structures, "unused_structures")
-
-        if "Structure_Type" in unused_structures.columns:
-            unused_acls = unused_structures[
-                unused_structures["Structure_Type"].str.contains(
-                    "acl", case=False, na=False
+def check_unused(results):
+    """CHECK 6: unused structures"""
+    print("\n" + "=" * 80)
+    print("CHECK 6: UNUSED STRUCTURES (Cleanup Candidates)")
+    print("=" * 80)
+
+    unused_structures = pd.DataFrame()
+    try:
+        unused_structures = query_result(results, "unused").convert_dtypes(
+            dtype_backend="pyarrow"
+        )
+        n_unused_structures = len(unused_structures)
+        if n_unused_structures:
+            save_csv(unused_structures, "unused_structures")
+
+            if "Structure_Type" in unused_structures.columns:
+                # Few distinct types: lowercase/match the categories, not every row
+                structure_type = unused_structures["Structure_Type"].astype("category")
+                is_acl = structure_type.str.lower().str.contains(
+                    "acl", regex=False, na=False
                 )
-            ]
-            if len(unused_acls) > 0:
-                print(f"ℹ️  {len(unused_acls)} unused ACLs")
-                save_csv(unused_acls, "unused_acls")
+                unused_acls = unused_structures[is_acl]
+                n_unused_acls = len(unused_acls)
+                if n_unused_acls:
+                    print(f"ℹ️  {n_unused_acls} unused ACLs")
+                    save_csv(unused_acls, "unused_acls")
+
+            print(f"✓ Total unused: {n_unused_structures}")
+        else:
+            print("✓ No unused structures")
+    except Exception as e:
+        print(f"✗ Unused structures error: {e}")
+    return unused_structures
 
-        print(f"✓ Total unused: {len(unused_structures)}")
-    else:
-        print("✓ No unused structures")
-except Exception as e:
-    print(f"✗ Unused structures error: {e}")
 
 # ============================================================================
 # CHECK 7: OSPF CONFIGURATION
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 7: OSPF CONFIGURATION")
-print("=" * 80)
-
-ospf_process = pd.DataFrame()
-try:
-    ospf_process = bf.q.ospfProcessConfiguration().answer().frame()
-    if len(ospf_process) > 0:
-        save_csv(ospf_process, "ospf_process")
-        print(f"✓ OSPF processes: {len(ospf_process)}")
-
-        ospf_interfaces = bf.q.ospfInterfaceConfiguration().answer().frame()
-        if len(ospf_interfaces) > 0:
-            save_csv(ospf_interfaces, "ospf_interfaces")
-
-            if "Passive" in ospf_interfaces.columns:
-                passive = ospf_interfaces[ospf_interfaces["Passive"] == True]
-                print(f"✓ OSPF interfaces: {len(ospf_interfaces)}")
-                print(f"  - Passive: {len(passive)}")
-                print(f"  - Active: {len(ospf_interfaces) - len(passive)}")
-            else:
-                print(f"✓ OSPF interfaces: {len(ospf_interfaces)}")
-    else:
-        print("ℹ️  No OSPF")
-except Exception as e:
-    print(f"✗ OSPF error: {e}")
+def check_ospf(results):
+    """CHECK 7: OSPF processes and passive interfaces"""
+    print("\n" + "=" * 80)
+    print("CHECK 7: OSPF CONFIGURATION")
+    print("=" * 80)
+
+    ospf_process = pd.DataFrame()
+    try:
+        ospf_process = query_result(results, "ospf_process")
+        n_ospf_process = len(ospf_process)
+        if n_ospf_process:
+            save_csv(ospf_process, "ospf_process")
+            print(f"✓ OSPF processes: {n_ospf_process}")
+
+            ospf_interfaces = query_result(results, "ospf_interfaces")
+            n_ospf_interfaces = len(ospf_interfaces)
+            if n_ospf_interfaces:
+                save_csv(ospf_interfaces, "ospf_interfaces")
+
+                if "Passive" in ospf_interfaces.columns:
+                    passive = ospf_interfaces[ospf_interfaces["Passive"].fillna(False)]
+                    print(f"✓ OSPF interfaces: {n_ospf_interfaces}")
+                    print(f"  - Passive: {len(passive)}")
+                    print(f"  - Active: {n_ospf_interfaces - len(passive)}")
+                else:
+                    print(f"✓ OSPF interfaces: {n_ospf_interfaces}")
+        else:
+            print("ℹ️  No OSPF")
+    except Exception as e:
+        print(f"✗ OSPF error: {e}")
+    return ospf_process
+
 
 # ============================================================================
 # CHECK 8: LAYER 2 TOPOLOGY (Optional - may not be in all Batfish versions)
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 8: LAYER 2 TOPOLOGY")
-print("=" * 80)
-
-try:
-    if hasattr(bf.q, "layer2"):
-        layer2 = bf.q.layer2().answer().frame()
-        if len(layer2) > 0:
-            save_csv(layer2, "layer2_topology")
-            print(f"✓ L2 edges: {len(layer2)}")
+def check_layer2(snapshot, available):
+    """CHECK 8: layer 2 topology"""
+    print("\n" + "=" * 80)
+    print("CHECK 8: LAYER 2 TOPOLOGY")
+    print("=" * 80)
+
+    try:
+        if "layer2" in available:
+            layer2 = cached_query("layer2", bf.q.layer2, snapshot)
+            n_layer2 = len(layer2)
+            if n_layer2:
+                save_csv(layer2, "layer2_topology")
+                print(f"✓ L2 edges: {n_layer2}")
+            else:
+                print("ℹ️  No L2 topology")
         else:
-            print("ℹ️  No L2 topology")
-    else:
-        print("ℹ️  Layer 2 query not available in this Batfish version")
-except Exception as e:
-    print(f"ℹ️  L2 topology not available: {e}")
+            print("ℹ️  Layer 2 query not available in this Batfish version")
+    except Exception as e:
+        print(f"ℹ️  L2 topology not available: {e}")
+
 
 # ============================================================================
 # CHECK 9: NTP CONFIGURATION (Optional - may not be in all Batfish versions)
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 9: NTP CONSISTENCY")
-print("=" * 80)
-
-try:
-    if hasattr(bf.q, "ntpServers"):
-        ntp = bf.q.ntpServers().answer().frame()
-        if len(ntp) > 0:
-            save_csv(ntp, "ntp_servers")
-            if "Server" in ntp.columns:
-                unique = ntp["Server"].nunique()
-                print(f"✓ NTP servers: {unique}")
-                if unique > 1:
-                    print(f"⚠️  Multiple NTP servers (inconsistency)")
+def check_ntp(snapshot, available):
+    """CHECK 9: NTP server consistency"""
+    print("\n" + "=" * 80)
+    print("CHECK 9: NTP CONSISTENCY")
+    print("=" * 80)
+
+    try:
+        if "ntpServers" in available:
+            ntp = cached_query("ntpServers", bf.q.ntpServers, snapshot)
+            if not ntp.empty:
+                save_csv(ntp, "ntp_servers")
+                if "Server" in ntp.columns:
+                    unique = ntp["Server"].nunique()
+                    print(f"✓ NTP servers: {unique}")
+                    if unique > 1:
+                        print(f"⚠️  Multiple NTP servers (inconsistency)")
+            else:
+                print("⚠️  No NTP configured")
         else:
-            print("⚠️  No NTP configured")
-    else:
-        print("ℹ️  NTP query not available in this Batfish version")
-except Exception as e:
-    print(f"ℹ️  NTP check not available: {e}")
+            print("ℹ️  NTP query not available in this Batfish version")
+    except Exception as e:
+        print(f"ℹ️  NTP check not available: {e}")
+
 
 # ============================================================================
 # CHECK 10: CONFIGURATION INVENTORY
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 10: CONFIGURATION INVENTORY")
-print("=" * 80)
-
-defined = pd.DataFrame()
-try:
-    defined = bf.q.definedStructures().answer().frame()
-    if len(defined) > 0:
-        save_csv(defined, "defined_structures")
-
-        if "Structure_Type" in defined.columns:
-            counts = defined["Structure_Type"].value_counts()
-            print(f"✓ Structures defined:")
-            for struct, count in counts.head(15).items():
-                print(f"  - {struct}: {count}")
+def check_inventory(results):
+    """CHECK 10: defined structure inventory"""
+    print("\n" + "=" * 80)
+    print("CHECK 10: CONFIGURATION INVENTORY")
+    print("=" * 80)
+
+    defined = pd.DataFrame()
+    try:
+        defined = query_result(results, "defined").convert_dtypes(
+            dtype_backend="pyarrow"
+        )
+        n_defined = len(defined)
+        if n_defined:
+            save_csv(defined, "defined_structures")
+
+            if "Structure_Type" in defined.columns:
+                defined["Structure_Type"] = defined["Structure_Type"].astype(
+                    "category"
+                )
+                counts = defined["Structure_Type"].value_counts()
+                print(f"✓ Structures defined:")
+                for struct, count in counts.head(15).items():
+                    print(f"  - {struct}: {count}")
+            else:
+                print(f"✓ Total structures: {n_defined}")
         else:
-            print(f"✓ Total structures: {len(defined)}")
-    else:
-        print("ℹ️  No structures")
-except Exception as e:
-    print(f"✗ Inventory error: {e}")
+            print("ℹ️  No structures")
+    except Exception as e:
+        print(f"✗ Inventory error: {e}")
+    return defined
+
 
 # ============================================================================
 # CHECK 11: COMPLIANCE SUMMARY
 # ============================================================================
-print("\n" + "=" * 80)
-print("CHECK 11: COMPLIANCE SUMMARY")
-print("=" * 80)
-
-try:
-    devices = set()
-    if len(interfaces) > 0 and "Interface" in interfaces.columns:
-        for intf in interfaces["Interface"]:
-            hostname = extract_hostname(intf)
-            if hostname:
-                devices.add(hostname)
-
-    summary = {
-        "timestamp": datetime.now().isoformat(),
-        "total_devices": len(devices),
-        "device_names": list(devices),
-        "fhrp_groups": len(fhrp) if "fhrp" in locals() and len(fhrp) > 0 else 0,
-        "interfaces_total": len(interfaces) if len(interfaces) > 0 else 0,
-        "interfaces_no_description": len(no_desc) if len(no_desc) > 0 else 0,
-        "bgp_peers_total": len(bgp_peers) if len(bgp_peers) > 0 else 0,
-        "bgp_peers_no_auth": len(no_auth) if len(no_auth) > 0 else 0,
-        "routes_total": len(routes) if len(routes) > 0 else 0,
-        "acl_lines_total": len(acl_lines) if len(acl_lines) > 0 else 0,
-        "acl_dead_rules": len(unreachable) if len(unreachable) > 0 else 0,
-        "unused_structures": (
-            len(unused_structures) if len(unused_structures) > 0 else 0
-        ),
-        "ospf_processes": len(ospf_process) if len(ospf_process) > 0 else 0,
-        "defined_structures": len(defined) if len(defined) > 0 else 0,
-    }
-
-    summary_file = f"{OUTPUT_DIR}/compliance_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(summary_file, "w") as f:
-        json.dump(summary, f, indent=2)
-    print(f"[+] Saved: {summary_file}")
-
-    print(f"\n📊 Summary:")
-    print(f"   Devices: {summary['total_devices']}")
-    print(f"   FHRP groups: {summary['fhrp_groups']}")
-    print(f"   Interfaces: {summary['interfaces_total']}")
-    print(f"   BGP peers: {summary['bgp_peers_total']}")
-    print(f"   Routes: {summary['routes_total']}")
-    print(f"   OSPF processes: {summary['ospf_processes']}")
-    if summary["interfaces_no_description"] > 0:
-        print(f"   ⚠️  No description: {summary['interfaces_no_description']}")
-    if summary["bgp_peers_no_auth"] > 0:
-        print(f"   ⚠️  BGP no auth: {summary['bgp_peers_no_auth']}")
-    if summary["acl_dead_rules"] > 0:
-        print(f"   ⚠️  ACL dead rules: {summary['acl_dead_rules']}")
-    if summary["unused_structures"] > 0:
-        print(f"   ℹ️  Unused structures: {summary['unused_structures']}")
-
-except Exception as e:
-    print(f"✗ Summary error: {e}")
-
-print("\n" + "=" * 80)
-print("✅ ANALYSIS COMPLETE!")
-print(f"Output: {OUTPUT_DIR}")
-print("=" * 80)
+def check_summary(
+    fhrp,
+    interfaces,
+    no_desc,
+    bgp_peers,
+    no_auth,
+    routes,
+    acl_lines,
+    unreachable,
+    unused_structures,
+    ospf_process,
+    defined,
+):
+    """CHECK 11: write the compliance summary JSON and print the totals"""
+    print("\n" + "=" * 80)
+    print("CHECK 11: COMPLIANCE SUMMARY")
+    print("=" * 80)
+
+    try:
+        devices = set()
+        if not interfaces.empty and "Hostname" in interfaces.columns:
+            devices = set(interfaces["Hostname"].unique()) - {""}
+
+        summary = {
+            "timestamp": datetime.now().isoformat(),
+            "total_devices": len(devices),
+            "device_names": list(devices),
+            "fhrp_groups": len(fhrp),
+            "interfaces_total": len(interfaces),
+            "interfaces_no_description": len(no_desc),
+            "bgp_peers_total": len(bgp_peers),
+            "bgp_peers_no_auth": len(no_auth),
+            "routes_total": len(routes),
+            "acl_lines_total": len(acl_lines),
+            "acl_dead_rules": len(unreachable),
+            "unused_structures": len(unused_structures),
+            "ospf_processes": len(ospf_process),
+            "defined_structures": len(defined),
+        }
+
+        summary_file = f"{OUTPUT_DIR}/compliance_summary_{RUN_TS}.json"
+        with open(summary_file, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    summary, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                )
+            )
+        print(f"[+] Saved: {summary_file}")
+
+        print(f"\n📊 Summary:")
+        print(f"   Devices: {summary['total_devices']}")
+        print(f"   FHRP groups: {summary['fhrp_groups']}")
+        print(f"   Interfaces: {summary['interfaces_total']}")
+        print(f"   BGP peers: {summary['bgp_peers_total']}")
+        print(f"   Routes: {summary['routes_total']}")
+        print(f"   OSPF processes: {summary['ospf_processes']}")
+        if summary["interfaces_no_description"] > 0:
+            print(f"   ⚠️  No description: {summary['interfaces_no_description']}")
+        if summary["bgp_peers_no_auth"] > 0:
+            print(f"   ⚠️  BGP no auth: {summary['bgp_peers_no_auth']}")
+        if summary["acl_dead_rules"] > 0:
+            print(f"   ⚠️  ACL dead rules: {summary['acl_dead_rules']}")
+        if summary["unused_structures"] > 0:
+            print(f"   ℹ️  Unused structures: {summary['unused_structures']}")
+
+    except Exception as e:
+        print(f"✗ Summary error: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batfish network analysis")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--fhrp-only",
+        action="store_true",
+        help="Run only the FHRP (HSRP/VRRP) compliance check",
+    )
+    mode.add_argument(
+        "--full", action="store_true", help="Run all 11 checks (default)"
+    )
+    args = parser.parse_args()
+
+    snapshot = connect()
+    keys = FHRP_QUERIES if args.fhrp_only else QUERIES
+    results = run_queries(keys, snapshot)
+
+    fhrp = check_fhrp(results)
+    if not args.fhrp_only:
+        interfaces, no_desc = check_interfaces(results)
+        bgp_peers, no_auth = check_bgp(results)
+        routes = check_routes(results)
+        acl_lines, unreachable = check_acls(results)
+        unused_structures = check_unused(results)
+        ospf_process = check_ospf(results)
+        available = available_questions()
+        check_layer2(snapshot, available)
+        check_ntp(snapshot, available)
+        defined = check_inventory(results)
+        check_summary(
+            fhrp,
+            interfaces,
+            no_desc,
+            bgp_peers,
+            no_auth,
+            routes,
+            acl_lines,
+            unreachable,
+            unused_structures,
+            ospf_process,
+            defined,
+        )
+
+    print("\n" + "=" * 80)
+    print("WRITING OUTPUT")
+    print("=" * 80)
+    flush_writes()
+
+    print("\n" + "=" * 80)
+    print("✅ ANALYSIS COMPLETE!")
+    print(f"Output: {OUTPUT_DIR}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+FHRP (HSRP/VRRP) helpers for the Batfish analysis checks
+"""
+import numpy as np
+import pandas as pd
+
+# Batfish renders interfaces as "hostname[interface]"
+INTERFACE_PATTERN = r"^(?P<Hostname>[^\[]+)(?:\[(?P<Interface_Name>[^\]]+)\])?"
+
+# Batfish FHRP columns kept for the audit -> fhrp_unified CSV schema names
+FHRP_COLUMNS = {
+    "Interface": "Interface",
+    "Group_Id": "Group_ID",
+    "Priority": "Priority",
+    "Preempt": "Preempt",
+    "Active": "Enabled",
+}
+
+# Batfish flag columns compared across checks (object dtype as answered)
+FLAG_COLUMNS = (
+    "Enabled",
+    "Preempt",
+    "Password_Set",
+    "Unreachable",
+    "Passive",
+    "Active",
+)
+
+
+def split_interface(interfaces):
+    """Split Batfish interface objects (host[iface]) into Hostname/Interface_Name"""
+    return interfaces.astype(str).str.extract(INTERFACE_PATTERN).fillna("")
+
+
+def add_host_cols(df):
+    """Add Hostname/Interface_Name to a frame with an Interface column, once"""
+    if "Interface" in df.columns and "Hostname" not in df.columns:
+        df[["Hostname", "Interface_Name"]] = split_interface(df["Interface"])
+    return df
+
+
+def cast_flags(df):
+    """Cast Batfish flag columns to nullable boolean so masks use ~ not == False"""
+    for col in FLAG_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("boolean")
+    return df
+
+
+def summarize_fhrp(frame, protocol):
+    """Project an hsrpProperties/vrrpProperties answer onto the unified schema"""
+    add_host_cols(frame)
+    return (
+        frame[[*FHRP_COLUMNS, "Hostname", "Interface_Name"]]
+        .rename(columns=FHRP_COLUMNS)
+        .assign(Protocol=protocol)
+    )
+
+
+def audit_fhrp(fhrp):
+    """Report group redundancy problems and set Audit_Status on a unified frame"""
+    # Low-cardinality labels: integer codes make grouping/comparison cheap
+    for col in ("Protocol", "Hostname", "Interface_Name"):
+        fhrp[col] = fhrp[col].astype("category")
+
+    # Audit every (protocol, group) in a single groupby pass
+    groups = fhrp.groupby(["Protocol", "Group_ID"], observed=True).agg(
+        Member_Count=("Hostname", "size"),
+        Unique_Priorities=("Priority", "nunique"),
+        Hostnames=("Hostname", ", ".join),
+    )
+    orphaned = groups[groups["Member_Count"] < 2]
+    conflicts = groups[
+        (groups["Unique_Priorities"] == 1) & (groups["Member_Count"] > 1)
+    ]
+    for (protocol, group_id), hosts in orphaned["Hostnames"].items():
+        print(f"⚠️  {protocol} group {group_id} has no redundancy ({hosts})")
+    for (protocol, group_id), hosts in conflicts["Hostnames"].items():
+        print(f"⚠️  {protocol} group {group_id} priority conflict ({hosts})")
+
+    # One branchless select; earlier conditions take precedence
+    cast_flags(fhrp)
+    member_count = fhrp.groupby(["Protocol", "Group_ID"], observed=True)[
+        "Hostname"
+    ].transform("size")
+    conditions = [
+        (member_count < 2).to_numpy(bool),
+        ~fhrp["Enabled"].fillna(True).to_numpy(bool),
+        ~fhrp["Preempt"].fillna(True).to_numpy(bool),
+    ]
+    fhrp["Audit_Status"] = pd.Categorical(
+        np.select(conditions, ["ORPHANED", "DISABLED", "NO_PREEMPT"], default="OK")
+    )
+
+    print(f"✓ FHRP groups audited: {len(groups)}")
+    return fhrp
@@ -44,7 +44,7 @@ echo
 echo "[+] Running network analysis..."
 echo
 source "$SCRIPT_DIR/.venv/bin/activate"
-python3 "$SCRIPT_DIR/analyze_network.py"
+python3 "$SCRIPT_DIR/analyze_network.py" "$@"
 
 echo
 echo "======================================"
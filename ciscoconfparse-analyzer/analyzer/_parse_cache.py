@@ -0,0 +1,29 @@
+"""
+Shared CiscoConfParse cache
+Lets every auditor that reads the same config file reuse one parse tree.
+audit_device runs the auditors back to back on one file, so only the most
+recent file is kept; older trees are released instead of piling up per worker.
+"""
+
+from functools import lru_cache
+import re
+
+from ciscoconfparse import CiscoConfParse
+
+_RE_HOSTNAME_CAPTURE = re.compile(r'^hostname\s+(\S+)')
+
+
+@lru_cache(maxsize=1)
+def get_parse(config_file: str) -> CiscoConfParse:
+    """Parse a Cisco configuration file once; callers must treat it as read-only"""
+    return CiscoConfParse(config_file, syntax='ios')
+
+
+@lru_cache(maxsize=1)
+def get_hostname(config_file: str) -> str:
+    """Extract hostname from configuration, stopping at the first match"""
+    for obj in get_parse(config_file).ConfigObjs:
+        match = _RE_HOSTNAME_CAPTURE.match(obj.text)
+        if match:
+            return match.group(1)
+    return "unknown"
@@ -3,10 +3,98 @@ BGP Configuration Auditor
 Analyzes BGP configurations for security and compliance
 """
 
-from ciscoconfparse import CiscoConfParse
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Tuple
 import re
 
+from _parse_cache import get_hostname, get_parse
+
+# Pre-compiled patterns used while auditing
+_RE_ROUTER_BGP = re.compile(r'^router\s+bgp\s+(\d+)')
+_RE_NEIGHBOR_REMOTE_AS = re.compile(r'^\s+neighbor\s+(\S+)\s+remote-as\s+(\d+)')
+_RE_ROUTER_ID = re.compile(r'^\s+bgp\s+router-id')
+
+# Neighbor feature bits set by classify_neighbor_lines
+_BIT_PASSWORD = 1 << 0
+_BIT_TTL_SECURITY = 1 << 1
+_BIT_FILTER = 1 << 2  # prefix-list, filter-list or route-map
+_BIT_MAX_PREFIX = 1 << 3
+_BIT_UPDATE_SOURCE = 1 << 4
+
+_NEIGHBOR_BITS = {
+    'password': _BIT_PASSWORD,
+    'ttl-security': _BIT_TTL_SECURITY,
+    'prefix-list': _BIT_FILTER,
+    'filter-list': _BIT_FILTER,
+    'route-map': _BIT_FILTER,
+    'maximum-prefix': _BIT_MAX_PREFIX,
+    'update-source': _BIT_UPDATE_SOURCE,
+}
+
+# Issue templates built once; per-neighbor text is filled in via % neighbor IP
+_ISSUE_BGP_ROUTER_ID = {
+    'severity': 'MEDIUM',
+    'issue': 'BGP router-id not explicitly configured',
+    'remediation': 'Add: bgp router-id <IP-address>'
+}
+_ISSUE_BGP_LOG_CHANGES = {
+    'severity': 'LOW',
+    'issue': 'BGP neighbor changes logging not enabled',
+    'remediation': 'Add: bgp log-neighbor-changes'
+}
+_ISSUE_BGP_MD5 = {
+    'severity': 'CRITICAL',
+    'issue': 'BGP neighbor %s missing MD5 authentication',
+    'pci_requirement': 'PCI-DSS 4.1 - Use strong cryptography for transmission',
+    'remediation': 'Add: neighbor %s password <md5-password>'
+}
+_ISSUE_BGP_TTL = {
+    'severity': 'HIGH',
+    'issue': 'BGP neighbor %s missing TTL security',
+    'remediation': 'Add: neighbor %s ttl-security hops 1 (for eBGP)'
+}
+_ISSUE_BGP_FILTER = {
+    'severity': 'HIGH',
+    'issue': 'BGP neighbor %s has no inbound/outbound filtering',
+    'pci_requirement': 'PCI-DSS 1.3.6 - Filter traffic between network segments',
+    'remediation': 'Add: neighbor %s prefix-list <name> in/out'
+}
+_ISSUE_BGP_MAX_PREFIX = {
+    'severity': 'MEDIUM',
+    'issue': 'BGP neighbor %s has no maximum-prefix limit',
+    'remediation': 'Add: neighbor %s maximum-prefix <limit> 85'
+}
+
+
+def _neighbor_issue(template: Dict[str, str], neighbor_ip: str) -> Dict[str, str]:
+    """Copy an issue template, filling in the neighbor IP"""
+    issue = template.copy()
+    issue['issue'] %= neighbor_ip
+    issue['remediation'] %= neighbor_ip
+    return issue
+
+
+def classify_neighbor_lines(lines: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Classify BGP child lines in one pass.
+    
+    Returns (neighbor IP -> remote AS, neighbor IP -> feature bitmask).
+    """
+    remote_as = {}
+    masks = {}
+    for line in lines:
+        # Only the first three tokens matter: neighbor <ip> <keyword> ...
+        toks = line.split(None, 3)
+        if len(toks) < 3 or toks[0] != 'neighbor':
+            continue
+        
+        keyword = toks[2]
+        if keyword == 'remote-as':
+            match = _RE_NEIGHBOR_REMOTE_AS.match(line)
+            if match:
+                remote_as[match.group(1)] = match.group(2)
+        else:
+            masks[toks[1]] = masks.get(toks[1], 0) | _NEIGHBOR_BITS.get(keyword, 0)
+    return remote_as, masks
+
 
 class BGPAuditor:
     """Auditor for BGP configurations"""
@@ -14,15 +102,8 @@ class BGPAuditor:
     def __init__(self, config_file: str):
         """Initialize with a Cisco configuration file"""
         self.config_file = config_file
-        self.parse = CiscoConfParse(config_file, syntax='ios')
-        self.device_name = self._extract_hostname()
-    
-    def _extract_hostname(self) -> str:
-        """Extract hostname from configuration"""
-        hostname_objs = self.parse.find_objects(r'^hostname\s+')
-        if hostname_objs:
-            return hostname_objs[0].text.split()[1]
-        return "unknown"
+        self.parse = get_parse(config_file)
+        self.device_name = get_hostname(config_file)
     
     def audit_bgp_config(self) -> Dict[str, Any]:
         """Audit BGP configuration"""
@@ -52,159 +133,99 @@ class BGPAuditor:
         
         # Extract ASN
         bgp_obj = bgp_objs[0]
-        match = re.match(r'^router\s+bgp\s+(\d+)', bgp_obj.text)
+        match = _RE_ROUTER_BGP.match(bgp_obj.text)
         if match:
             result['asn'] = int(match.group(1))
         
         # Audit global BGP configuration
         self._audit_global_bgp_config(bgp_obj, result['global_config'])
         
-        # Find all BGP neighbors
-        neighbor_objs = self.parse.find_children_w_parents(
-            parentspec=r'^router\s+bgp',
-            childspec=r'^\s+neighbor\s+\S+\s+remote-as'
-        )
+        # Classify neighbor statements in a single pass over the BGP children
+        remote_as, masks = classify_neighbor_lines(child.text for child in bgp_obj.children)
         
-        # Group neighbor configurations
-        neighbors = {}
-        for neighbor_line in neighbor_objs:
-            match = re.match(r'^\s+neighbor\s+(\S+)\s+remote-as\s+(\d+)', neighbor_line.text)
-            if match:
-                neighbor_ip = match.group(1)
-                remote_as = match.group(2)
-                neighbors[neighbor_ip] = {
-                    'neighbor': neighbor_ip,
-                    'remote_as': remote_as,
-                    'compliant': True,
-                    'issues': [],
-                    'risk_score': 0
-                }
-        
-        # Audit each neighbor
-        for neighbor_ip in neighbors:
-            neighbor_result = self._audit_bgp_neighbor(bgp_obj, neighbor_ip, neighbors[neighbor_ip])
-            result['neighbors'].append(neighbor_result)
+        # Audit each neighbor, counting compliant ones as they are added
+        compliant = 0
+        for neighbor_ip, neighbor_as in remote_as.items():
+            neighbor_data = {
+                'neighbor': neighbor_ip,
+                'remote_as': neighbor_as,
+                'compliant': True,
+                'issues': [],
+                'risk_score': 0
+            }
+            self._audit_bgp_neighbor(neighbor_ip, neighbor_data, masks.get(neighbor_ip, 0))
+            compliant += neighbor_data['compliant']
+            result['neighbors'].append(neighbor_data)
         
         # Calculate statistics
-        result['total_neighbors'] = len(result['neighbors'])
-        result['compliant_neighbors'] = sum(1 for n in result['neighbors'] if n['compliant'])
+        total = len(result['neighbors'])
+        result['total_neighbors'] = total
+        result['compliant_neighbors'] = compliant
         
-        if result['total_neighbors'] > 0:
-            result['overall_compliance_pct'] = round(
-                (result['compliant_neighbors'] / result['total_neighbors']) * 100, 2
-            )
+        if total > 0:
+            result['overall_compliance_pct'] = round((compliant / total) * 100, 2)
         
         return result
     
     def _audit_global_bgp_config(self, bgp_obj, global_config: Dict):
         """Audit global BGP configuration"""
         
-        # Check for BGP router-id
-        router_id_found = False
+        # Check router-id and log-neighbor-changes in one pass, stopping once both are seen
+        router_id_found = log_changes_found = False
         for child in bgp_obj.children:
-            if re.match(r'^\s+bgp\s+router-id', child.text):
+            text = child.text
+            if not router_id_found and _RE_ROUTER_ID.match(text):
                 router_id_found = True
+            if not log_changes_found and 'bgp log-neighbor-changes' in text:
+                log_changes_found = True
+            if router_id_found and log_changes_found:
                 break
         
         if not router_id_found:
             global_config['compliant'] = False
-            global_config['issues'].append({
-                'severity': 'MEDIUM',
-                'issue': 'BGP router-id not explicitly configured',
-                'remediation': 'Add: bgp router-id <IP-address>'
-            })
-        
-        # Check for BGP log-neighbor-changes
-        log_changes_found = False
-        for child in bgp_obj.children:
-            if 'bgp log-neighbor-changes' in child.text:
-                log_changes_found = True
-                break
+            global_config['issues'].append(_ISSUE_BGP_ROUTER_ID.copy())
         
         if not log_changes_found:
             global_config['compliant'] = False
-            global_config['issues'].append({
-                'severity': 'LOW',
-                'issue': 'BGP neighbor changes logging not enabled',
-                'remediation': 'Add: bgp log-neighbor-changes'
-            })
+            global_config['issues'].append(_ISSUE_BGP_LOG_CHANGES.copy())
     
-    def _audit_bgp_neighbor(self, bgp_obj, neighbor_ip: str, neighbor_data: Dict) -> Dict:
-        """Audit a specific BGP neighbor configuration"""
+    def _audit_bgp_neighbor(self, neighbor_ip: str, neighbor_data: Dict, features: int) -> Dict:
+        """Audit a specific BGP neighbor configuration (updates neighbor_data in place)"""
         
-        result = neighbor_data.copy()
+        result = neighbor_data
+        score = 0
         
         # Check for MD5 authentication
-        password_found = False
-        for child in bgp_obj.children:
-            if f'neighbor {neighbor_ip} password' in child.text:
-                password_found = True
-                break
+        password_found = bool(features & _BIT_PASSWORD)
         
         if not password_found:
             result['compliant'] = False
-            result['risk_score'] += 40
-            result['issues'].append({
-                'severity': 'CRITICAL',
-                'issue': f'BGP neighbor {neighbor_ip} missing MD5 authentication',
-                'pci_requirement': 'PCI-DSS 4.1 - Use strong cryptography for transmission',
-                'remediation': f'Add: neighbor {neighbor_ip} password <md5-password>'
-            })
+            score += 40
+            result['issues'].append(_neighbor_issue(_ISSUE_BGP_MD5, neighbor_ip))
         
         # Check for update-source (for iBGP)
-        update_source_found = False
-        for child in bgp_obj.children:
-            if f'neighbor {neighbor_ip} update-source' in child.text:
-                update_source_found = True
-                break
+        update_source_found = bool(features & _BIT_UPDATE_SOURCE)
         
         # Check for TTL security
-        ttl_security_found = False
-        for child in bgp_obj.children:
-            if f'neighbor {neighbor_ip} ttl-security' in child.text:
-                ttl_security_found = True
-                break
+        ttl_security_found = bool(features & _BIT_TTL_SECURITY)
         
         if not ttl_security_found:
-            result['risk_score'] += 20
-            result['issues'].append({
-                'severity': 'HIGH',
-                'issue': f'BGP neighbor {neighbor_ip} missing TTL security',
-                'remediation': f'Add: neighbor {neighbor_ip} ttl-security hops 1 (for eBGP)'
-            })
+            score += 20
+            result['issues'].append(_neighbor_issue(_ISSUE_BGP_TTL, neighbor_ip))
         
         # Check for prefix-list or filter-list
-        filtering_found = False
-        for child in bgp_obj.children:
-            if f'neighbor {neighbor_ip} prefix-list' in child.text or \
-               f'neighbor {neighbor_ip} filter-list' in child.text or \
-               f'neighbor {neighbor_ip} route-map' in child.text:
-                filtering_found = True
-                break
+        filtering_found = bool(features & _BIT_FILTER)
         
         if not filtering_found:
-            result['risk_score'] += 25
-            result['issues'].append({
-                'severity': 'HIGH',
-                'issue': f'BGP neighbor {neighbor_ip} has no inbound/outbound filtering',
-                'pci_requirement': 'PCI-DSS 1.3.6 - Filter traffic between network segments',
-                'remediation': f'Add: neighbor {neighbor_ip} prefix-list <name> in/out'
-            })
+            score += 25
+            result['issues'].append(_neighbor_issue(_ISSUE_BGP_FILTER, neighbor_ip))
         
         # Check for maximum-prefix limit
-        max_prefix_found = False
-        for child in bgp_obj.children:
-            if f'neighbor {neighbor_ip} maximum-prefix' in child.text:
-                max_prefix_found = True
-                break
+        max_prefix_found = bool(features & _BIT_MAX_PREFIX)
         
         if not max_prefix_found:
-            result['risk_score'] += 15
-            result['issues'].append({
-                'severity': 'MEDIUM',
-                'issue': f'BGP neighbor {neighbor_ip} has no maximum-prefix limit',
-                'remediation': f'Add: neighbor {neighbor_ip} maximum-prefix <limit> 85'
-            })
-        
-        result['risk_score'] = min(result['risk_score'], 100)
+            score += 15
+            result['issues'].append(_neighbor_issue(_ISSUE_BGP_MAX_PREFIX, neighbor_ip))
+        
+        result['risk_score'] = 100 if score > 100 else score
         return result
@@ -3,10 +3,73 @@ FHRP (HSRP/VRRP/GLBP) Configuration Auditor
 Analyzes First Hop Redundancy Protocol configurations for security and compliance
 """
 
-from ciscoconfparse import CiscoConfParse
+from functools import lru_cache
 from typing import Dict, List, Any
 import re
 
+from _parse_cache import get_hostname, get_parse
+
+# Pre-compiled patterns used while auditing
+_RE_STANDBY = re.compile(r'^\s+standby\s+(\d+)')
+_RE_VRRP = re.compile(r'^\s+vrrp\s+(\d+)')
+_RE_GLBP = re.compile(r'^\s+glbp\s+(\d+)')
+
+# Per-protocol differences: keyword -> (protocol, group pattern, recommended timers)
+_FHRP_SPEC = {
+    'standby': ('HSRP', _RE_STANDBY, 'timers msec 250 msec 750'),
+    'vrrp': ('VRRP', _RE_VRRP, 'timers advertise msec 250'),
+    'glbp': ('GLBP', _RE_GLBP, 'timers msec 250 msec 750'),
+}
+
+# Checks applied to every group:
+# (keyword, severity, risk score, affects compliance, issue, PCI requirement, remediation)
+_FHRP_CHECKS = (
+    ('authentication', 'HIGH', 30, True, 'missing authentication',
+     'PCI-DSS 2.2.4 - Configure system security parameters',
+     'Add: {keyword} {group_id} authentication md5 key-string <password>'),
+    ('preempt', 'MEDIUM', 15, True, 'missing preempt',
+     None,
+     'Add: {keyword} {group_id} preempt'),
+    ('timers', 'LOW', 5, False, 'using default timers',
+     None,
+     'Consider: {keyword} {group_id} {timers}'),
+)
+
+# Check keywords: the index stores these exact objects, so set lookups in the
+# audit loop hit on identity, and tokens no check looks at are never stored
+_FHRP_KEYWORDS = {check[0]: check[0] for check in _FHRP_CHECKS}
+
+
+def _issue_template(severity: str, issue: str, pci: str, remediation: str) -> Dict[str, str]:
+    """Issue dict whose 'issue'/'remediation' still take the group id via %"""
+    template = {'severity': severity, 'issue': issue}
+    if pci:
+        template['pci_requirement'] = pci
+    template['remediation'] = remediation
+    return template
+
+
+# Issue templates built once per protocol:
+# keyword -> [(check keyword, risk score, affects compliance, issue template)]
+_FHRP_ISSUES = {
+    keyword: [
+        (_FHRP_KEYWORDS[check], risk, required, _issue_template(
+            severity,
+            f'{protocol} group %s {issue}',
+            pci,
+            remediation.format(keyword=keyword, group_id='%s', timers=timers),
+        ))
+        for check, severity, risk, required, issue, pci, remediation in _FHRP_CHECKS
+    ]
+    for keyword, (protocol, _, timers) in _FHRP_SPEC.items()
+}
+
+
+@lru_cache(maxsize=4096)
+def _intf_name(text: str) -> str:
+    """Interface name from an 'interface <name>' line, cached for reuse across protocols"""
+    return text.split(None, 2)[1]
+
 
 class FHRPAuditor:
     """Auditor for FHRP configurations (HSRP, VRRP, GLBP)"""
@@ -14,15 +77,8 @@ class FHRPAuditor:
     def __init__(self, config_file: str):
         """Initialize with a Cisco configuration file"""
         self.config_file = config_file
-        self.parse = CiscoConfParse(config_file, syntax='ios')
-        self.device_name = self._extract_hostname()
-    
-    def _extract_hostname(self) -> str:
-        """Extract hostname from configuration"""
-        hostname_objs = self.parse.find_objects(r'^hostname\s+')
-        if hostname_objs:
-            return hostname_objs[0].text.split()[1]
-        return "unknown"
+        self.parse = get_parse(config_file)
+        self.device_name = get_hostname(config_file)
     
     def audit_all_interfaces(self) -> Dict[str, Any]:
         """Audit all interfaces with FHRP configured"""
@@ -35,23 +91,11 @@ class FHRPAuditor:
             'overall_compliance_pct': 0.0
         }
         
-        # Find all interfaces with FHRP
-        hsrp_intfs = self._find_hsrp_interfaces()
-        vrrp_intfs = self._find_vrrp_interfaces()
-        glbp_intfs = self._find_glbp_interfaces()
-        
-        # Audit each protocol
-        for intf_obj in hsrp_intfs:
-            audit_result = self._audit_hsrp_interface(intf_obj)
-            results['interfaces'].append(audit_result)
-        
-        for intf_obj in vrrp_intfs:
-            audit_result = self._audit_vrrp_interface(intf_obj)
-            results['interfaces'].append(audit_result)
-        
-        for intf_obj in glbp_intfs:
-            audit_result = self._audit_glbp_interface(intf_obj)
-            results['interfaces'].append(audit_result)
+        # Find and audit all interfaces with FHRP, one protocol at a time
+        for keyword, intf_objs in self._find_fhrp_interfaces().items():
+            for intf_obj in intf_objs:
+                audit_result = self._audit_fhrp_interface(intf_obj, keyword)
+                results['interfaces'].append(audit_result)
         
         # Calculate statistics
         results['total_fhrp_interfaces'] = len(results['interfaces'])
@@ -64,242 +108,61 @@ class FHRPAuditor:
         
         return results
     
-    def _find_hsrp_interfaces(self) -> List:
-        """Find all interfaces with HSRP configured"""
-        return self.parse.find_objects_w_child(
-            parentspec=r'^interface',
-            childspec=r'^\s+standby\s+\d+'
-        )
-    
-    def _find_vrrp_interfaces(self) -> List:
-        """Find all interfaces with VRRP configured"""
-        return self.parse.find_objects_w_child(
-            parentspec=r'^interface',
-            childspec=r'^\s+vrrp\s+\d+'
-        )
-    
-    def _find_glbp_interfaces(self) -> List:
-        """Find all interfaces with GLBP configured"""
-        return self.parse.find_objects_w_child(
-            parentspec=r'^interface',
-            childspec=r'^\s+glbp\s+\d+'
-        )
-    
-    def _audit_hsrp_interface(self, intf_obj) -> Dict[str, Any]:
-        """Audit HSRP configuration on an interface"""
-        interface_name = intf_obj.text.split()[1]
-        
-        result = {
-            'interface': interface_name,
-            'protocol': 'HSRP',
-            'compliant': True,
-            'issues': [],
-            'risk_score': 0
-        }
-        
-        # Get all HSRP groups on this interface
-        hsrp_groups = []
-        for child in intf_obj.children:
-            match = re.match(r'^\s+standby\s+(\d+)', child.text)
-            if match:
-                group_id = match.group(1)
-                if group_id not in hsrp_groups:
-                    hsrp_groups.append(group_id)
-        
-        for group_id in hsrp_groups:
-            # Check for authentication
-            auth_found = False
-            for child in intf_obj.children:
-                if f'standby {group_id} authentication' in child.text:
-                    auth_found = True
-                    break
-            
-            if not auth_found:
-                result['compliant'] = False
-                result['risk_score'] += 30
-                result['issues'].append({
-                    'severity': 'HIGH',
-                    'issue': f'HSRP group {group_id} missing authentication',
-                    'pci_requirement': 'PCI-DSS 2.2.4 - Configure system security parameters',
-                    'remediation': f'Add: standby {group_id} authentication md5 key-string <password>'
-                })
-            
-            # Check for preempt
-            preempt_found = False
+    def _find_fhrp_interfaces(self) -> Dict[str, List]:
+        """Find all interfaces with HSRP/VRRP/GLBP configured in one walk, keyed by protocol keyword"""
+        found = {keyword: [] for keyword in _FHRP_SPEC}
+        for intf_obj in self.parse.find_objects(r'^interface'):
+            keywords = set()
             for child in intf_obj.children:
-                if f'standby {group_id} preempt' in child.text:
-                    preempt_found = True
-                    break
-            
-            if not preempt_found:
-                result['compliant'] = False
-                result['risk_score'] += 15
-                result['issues'].append({
-                    'severity': 'MEDIUM',
-                    'issue': f'HSRP group {group_id} missing preempt',
-                    'remediation': f'Add: standby {group_id} preempt'
-                })
-            
-            # Check for custom timers (optional but recommended)
-            timers_found = False
-            for child in intf_obj.children:
-                if f'standby {group_id} timers' in child.text:
-                    timers_found = True
-                    break
-            
-            if not timers_found:
-                result['risk_score'] += 5
-                result['issues'].append({
-                    'severity': 'LOW',
-                    'issue': f'HSRP group {group_id} using default timers',
-                    'remediation': f'Consider: standby {group_id} timers msec 250 msec 750'
-                })
-        
-        result['risk_score'] = min(result['risk_score'], 100)
-        return result
+                # "<keyword> <group> ..." where the group is numeric
+                toks = child.text.split(None, 2)
+                if len(toks) >= 2 and toks[0] in found and toks[1][:1].isdigit():
+                    keywords.add(toks[0])
+            for keyword in keywords:
+                found[keyword].append(intf_obj)
+        return found
     
-    def _audit_vrrp_interface(self, intf_obj) -> Dict[str, Any]:
-        """Audit VRRP configuration on an interface"""
-        interface_name = intf_obj.text.split()[1]
+    def _audit_fhrp_interface(self, intf_obj, keyword: str) -> Dict[str, Any]:
+        """Audit HSRP/VRRP/GLBP configuration on an interface"""
+        protocol, group_re, _ = _FHRP_SPEC[keyword]
+        interface_name = _intf_name(intf_obj.text)
         
         result = {
             'interface': interface_name,
-            'protocol': 'VRRP',
+            'protocol': protocol,
             'compliant': True,
             'issues': [],
             'risk_score': 0
         }
         
-        # Get all VRRP groups on this interface
-        vrrp_groups = []
+        # Index group statements in one pass: group id -> configured keywords.
+        # Dict keys double as the de-duplicated groups, in config order.
+        features = {}
+        score = 0
         for child in intf_obj.children:
-            match = re.match(r'^\s+vrrp\s+(\d+)', child.text)
+            match = group_re.match(child.text)
             if match:
-                group_id = match.group(1)
-                if group_id not in vrrp_groups:
-                    vrrp_groups.append(group_id)
-        
-        for group_id in vrrp_groups:
-            # Check for authentication
-            auth_found = False
-            for child in intf_obj.children:
-                if f'vrrp {group_id} authentication' in child.text:
-                    auth_found = True
-                    break
-            
-            if not auth_found:
-                result['compliant'] = False
-                result['risk_score'] += 30
-                result['issues'].append({
-                    'severity': 'HIGH',
-                    'issue': f'VRRP group {group_id} missing authentication',
-                    'pci_requirement': 'PCI-DSS 2.2.4 - Configure system security parameters',
-                    'remediation': f'Add: vrrp {group_id} authentication md5 key-string <password>'
-                })
-            
-            # Check for preempt
-            preempt_found = False
-            for child in intf_obj.children:
-                if f'vrrp {group_id} preempt' in child.text:
-                    preempt_found = True
-                    break
-            
-            if not preempt_found:
-                result['compliant'] = False
-                result['risk_score'] += 15
-                result['issues'].append({
-                    'severity': 'MEDIUM',
-                    'issue': f'VRRP group {group_id} missing preempt',
-                    'remediation': f'Add: vrrp {group_id} preempt'
-                })
-            
-            # Check for timers
-            timers_found = False
-            for child in intf_obj.children:
-                if f'vrrp {group_id} timers' in child.text:
-                    timers_found = True
-                    break
-            
-            if not timers_found:
-                result['risk_score'] += 5
-                result['issues'].append({
-                    'severity': 'LOW',
-                    'issue': f'VRRP group {group_id} using default timers',
-                    'remediation': f'Consider: vrrp {group_id} timers advertise msec 250'
-                })
-        
-        result['risk_score'] = min(result['risk_score'], 100)
-        return result
-    
-    def _audit_glbp_interface(self, intf_obj) -> Dict[str, Any]:
-        """Audit GLBP configuration on an interface"""
-        interface_name = intf_obj.text.split()[1]
-        
-        result = {
-            'interface': interface_name,
-            'protocol': 'GLBP',
-            'compliant': True,
-            'issues': [],
-            'risk_score': 0
-        }
-        
-        # Get all GLBP groups on this interface
-        glbp_groups = []
-        for child in intf_obj.children:
-            match = re.match(r'^\s+glbp\s+(\d+)', child.text)
-            if match:
-                group_id = match.group(1)
-                if group_id not in glbp_groups:
-                    glbp_groups.append(group_id)
-        
-        for group_id in glbp_groups:
-            # Check for authentication
-            auth_found = False
-            for child in intf_obj.children:
-                if f'glbp {group_id} authentication' in child.text:
-                    auth_found = True
-                    break
-            
-            if not auth_found:
-                result['compliant'] = False
-                result['risk_score'] += 30
-                result['issues'].append({
-                    'severity': 'HIGH',
-                    'issue': f'GLBP group {group_id} missing authentication',
-                    'pci_requirement': 'PCI-DSS 2.2.4 - Configure system security parameters',
-                    'remediation': f'Add: glbp {group_id} authentication md5 key-string <password>'
-                })
-            
-            # Check for preempt
-            preempt_found = False
-            for child in intf_obj.children:
-                if f'glbp {group_id} preempt' in child.text:
-                    preempt_found = True
-                    break
-            
-            if not preempt_found:
-                result['compliant'] = False
-                result['risk_score'] += 15
-                result['issues'].append({
-                    'severity': 'MEDIUM',
-                    'issue': f'GLBP group {group_id} missing preempt',
-                    'remediation': f'Add: glbp {group_id} preempt'
-                })
-            
-            # Check for timers
-            timers_found = False
-            for child in intf_obj.children:
-                if f'glbp {group_id} timers' in child.text:
-                    timers_found = True
-                    break
-            
-            if not timers_found:
-                result['risk_score'] += 5
-                result['issues'].append({
-                    'severity': 'LOW',
-                    'issue': f'GLBP group {group_id} using default timers',
-                    'remediation': f'Consider: glbp {group_id} timers msec 250 msec 750'
-                })
-        
-        result['risk_score'] = min(result['risk_score'], 100)
+                group_features = features.setdefault(match.group(1), set())
+                toks = child.text.split(None, 3)
+                if len(toks) >= 3:
+                    kw = _FHRP_KEYWORDS.get(toks[2])
+                    if kw is not None:
+                        group_features.add(kw)
+        
+        issue_checks = _FHRP_ISSUES[keyword]
+        for group_id, group_features in features.items():
+            for check, risk, required, template in issue_checks:
+                if check in group_features:
+                    continue
+                
+                if required:
+                    result['compliant'] = False
+                score += risk
+                
+                issue_entry = template.copy()
+                issue_entry['issue'] %= group_id
+                issue_entry['remediation'] %= group_id
+                result['issues'].append(issue_entry)
+        
+        result['risk_score'] = 100 if score > 100 else score
         return result
@@ -3,16 +3,28 @@ Main analysis script for CiscoConfParse network audit
 Analyzes FHRP and BGP configurations from Cisco device configs
 """
 
+import io
 import os
-import json
-import glob
+import re
+import sys
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Iterator, Tuple
+
+import orjson
 
 from fhrp_auditor import FHRPAuditor
 from bgp_auditor import BGPAuditor
 
+# Report encoding: 2-space indent to match the previous json.dump output
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Placeholder written by write_json where a per-device sidecar is spliced in
+_RE_SIDECAR_MARK = re.compile(rb'"\\u0000sidecar:(\d+)"')
+
 # ANSI color codes for terminal output
 class Colors:
     HEADER = '\033[95m'
@@ -26,48 +38,162 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 
+# Plain output when redirected to a file/CI log or when NO_COLOR is set
+if not sys.stdout.isatty() or os.environ.get('NO_COLOR'):
+    for _name in ('HEADER', 'OKBLUE', 'OKCYAN', 'OKGREEN', 'WARNING', 'FAIL', 'ENDC', 'BOLD', 'UNDERLINE'):
+        setattr(Colors, _name, '')
+
+# Color wrappers and separators built once rather than on every line printed
+_HB = Colors.HEADER + Colors.BOLD
+_OBB = Colors.OKBLUE + Colors.BOLD
+_END = Colors.ENDC
+_SEP80 = '=' * 80
+
+_SEVERITY_COLORS = {
+    'CRITICAL': Colors.FAIL,
+    'HIGH': Colors.FAIL,
+    'MEDIUM': Colors.WARNING,
+    'LOW': Colors.OKCYAN
+}
+
+
 def print_header(text: str):
     """Print formatted header"""
-    print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{text:^80}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{'='*80}{Colors.ENDC}\n")
+    print(f"\n{_HB}{_SEP80}{_END}\n{_HB}{text:^80}{_END}\n{_HB}{_SEP80}{_END}\n")
+
+
+def format_subheader(text: str) -> str:
+    """Formatted subheader lines, newline-terminated"""
+    return f"\n{_OBB}{text}{_END}\n{Colors.OKBLUE}{'-'*len(text)}{_END}\n"
 
 
 def print_subheader(text: str):
     """Print formatted subheader"""
-    print(f"\n{Colors.OKBLUE}{Colors.BOLD}{text}{Colors.ENDC}")
-    print(f"{Colors.OKBLUE}{'-'*len(text)}{Colors.ENDC}")
+    sys.stdout.write(format_subheader(text))
 
 
-def print_issue(issue: Dict[str, Any]):
-    """Print formatted issue"""
-    severity_colors = {
-        'CRITICAL': Colors.FAIL,
-        'HIGH': Colors.FAIL,
-        'MEDIUM': Colors.WARNING,
-        'LOW': Colors.OKCYAN
-    }
+def format_issue(issue: Dict[str, Any]) -> str:
+    """Formatted issue lines, newline-terminated"""
+    color = _SEVERITY_COLORS.get(issue['severity'], Colors.ENDC)
+    pci = f"    📋 PCI: {issue['pci_requirement']}\n" if 'pci_requirement' in issue else ''
+    return f"  {color}[{issue['severity']}]{Colors.ENDC} {issue['issue']}\n{pci}    🔧 Remediation: {issue['remediation']}\n"
+
+
+def _audit_fhrp_one(config_file: str) -> Dict[str, Any]:
+    """FHRP audit of one config file (top-level so worker processes can pickle it)"""
+    return FHRPAuditor(config_file).audit_all_interfaces()
+
+
+def _audit_bgp_one(config_file: str) -> Dict[str, Any]:
+    """BGP audit of one config file (top-level so worker processes can pickle it)"""
+    return BGPAuditor(config_file).audit_bgp_config()
+
+
+def write_json(path: str, obj: Any):
+    """Write obj as indented JSON, C-encoded by orjson
+    
+    Path values name per-device ND-JSON sidecars; each is copied in as a JSON array
+    one device at a time, so the full device list is never held in memory.
+    """
+    sidecars = []
     
-    color = severity_colors.get(issue['severity'], Colors.ENDC)
-    print(f"  {color}[{issue['severity']}]{Colors.ENDC} {issue['issue']}")
-    if 'pci_requirement' in issue:
-        print(f"    📋 PCI: {issue['pci_requirement']}")
-    print(f"    🔧 Remediation: {issue['remediation']}")
+    def _placeholder(value):
+        if isinstance(value, Path):
+            sidecars.append(value)
+            return f"\0sidecar:{len(sidecars) - 1}"
+        raise TypeError
+    
+    data = orjson.dumps(obj, default=_placeholder, option=_JSON_OPTIONS)
+    with open(path, 'wb') as f:
+        pos = 0
+        for match in _RE_SIDECAR_MARK.finditer(data):
+            start = match.start()
+            line = data[data.rindex(b'\n', 0, start) + 1:start]
+            f.write(data[pos:start])
+            _copy_sidecar(f, sidecars[int(match.group(1))], len(line) - len(line.lstrip(b' ')))
+            pos = match.end()
+        f.write(data[pos:])
 
 
-def analyze_fhrp(config_files: List[str]) -> Dict[str, Any]:
-    """Analyze FHRP configurations across all devices"""
-    print_header("FHRP (HSRP/VRRP/GLBP) AUDIT")
+def _copy_sidecar(out: BinaryIO, sidecar: Path, indent: int):
+    """Write a sidecar's lines as an indented JSON array whose key sits at indent"""
+    item_sep = b'\n' + b' ' * (indent + 2)
+    sep = b'['
+    with open(sidecar, 'rb') as lines:
+        for line in lines:
+            item = orjson.dumps(orjson.loads(line), option=_JSON_OPTIONS)
+            out.write(sep + item_sep + item.replace(b'\n', item_sep))
+            sep = b','
+    out.write(b'[]' if sep == b'[' else b'\n' + b' ' * indent + b']')
+
+
+def audit_device(config_file: str) -> Dict[str, Any]:
+    """Run every auditor on one config file; errors are returned, not raised"""
+    results = {}
+    for name, audit in (('fhrp', _audit_fhrp_one), ('bgp', _audit_bgp_one)):
+        try:
+            results[name] = audit(config_file)
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def iter_device_results(config_files: List[str], jobs: int) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (config_file, results) in config_files order, one worker process per core when jobs > 1"""
+    if jobs <= 1:
+        for cf in config_files:
+            yield cf, audit_device(cf)
+        return
+    
+    # Both auditors run in the same worker so the file is parsed once per device
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        yield from zip(config_files, ex.map(audit_device, config_files))
+
+
+def stream_device_results(config_files: List[str], jobs: int, sidecars: Dict[str, BinaryIO],
+                          summaries: Dict[str, Any]) -> Dict[str, Dict[str, Exception]]:
+    """Audit every device, appending each result to its ND-JSON sidecar as it arrives
     
-    all_results = []
+    Summaries are updated per device and only failed audits are kept, returned as
+    auditor name -> {config_file: exception}.
+    """
+    errors = {name: {} for name in sidecars}
+    for config_file, results in iter_device_results(config_files, jobs):
+        for name, result in results.items():
+            if not isinstance(result, Exception):
+                try:
+                    line = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+                except Exception as e:
+                    result = e
+            if isinstance(result, Exception):
+                errors[name][config_file] = result
+                continue
+            sidecars[name].write(line + b'\n')
+            summaries[name].add(result)
+    return errors
+
+
+def iter_sidecar(config_files: List[str], sidecar: str, errors: Dict[str, Exception]) -> Iterator[Tuple[str, Any]]:
+    """Pair each config file with its result read back from the sidecar, or its audit error"""
+    with open(sidecar, 'rb') as lines:
+        for config_file in config_files:
+            error = errors.get(config_file)
+            yield config_file, error if error is not None else orjson.loads(next(lines))
+
+
+def analyze_fhrp(config_files: List[str], sidecar: str, errors: Dict[str, Exception]):
+    """Report FHRP configurations across all devices, reading results back from the sidecar"""
+    print_header("FHRP (HSRP/VRRP/GLBP) AUDIT")
     
-    for config_file in config_files:
-        print_subheader(f"Analyzing: {os.path.basename(config_file)}")
+    for config_file, result in iter_sidecar(config_files, sidecar, errors):
+        # Buffer each device's report and write it to stdout once
+        buf = io.StringIO()
+        out = buf.write
+        out(format_subheader(f"Analyzing: {os.path.basename(config_file)}"))
         
         try:
-            auditor = FHRPAuditor(config_file)
-            result = auditor.audit_all_interfaces()
-            all_results.append(result)
+            if isinstance(result, Exception):
+                raise result
             
             # Print summary for this device
             device = result['device']
@@ -76,53 +202,51 @@ def analyze_fhrp(config_files: List[str]) -> Dict[str, Any]:
             compliance_pct = result['overall_compliance_pct']
             
             if total == 0:
-                print(f"  ℹ️  No FHRP interfaces found on {device}")
+                out(f"  ℹ️  No FHRP interfaces found on {device}\n")
                 continue
             
             compliance_color = Colors.OKGREEN if compliance_pct == 100 else Colors.WARNING if compliance_pct >= 50 else Colors.FAIL
             
-            print(f"  Device: {Colors.BOLD}{device}{Colors.ENDC}")
-            print(f"  Total FHRP Interfaces: {total}")
-            print(f"  Compliant: {compliant}/{total}")
-            print(f"  Compliance: {compliance_color}{compliance_pct}%{Colors.ENDC}")
+            out(f"  Device: {Colors.BOLD}{device}{Colors.ENDC}\n"
+                f"  Total FHRP Interfaces: {total}\n"
+                f"  Compliant: {compliant}/{total}\n"
+                f"  Compliance: {compliance_color}{compliance_pct}%{Colors.ENDC}\n")
             
             # Print issues for each interface
             for intf in result['interfaces']:
                 if not intf['compliant']:
-                    print(f"\n  {Colors.WARNING}⚠️  {intf['interface']} ({intf['protocol']}){Colors.ENDC}")
-                    print(f"    Risk Score: {intf['risk_score']}/100")
+                    out(f"\n  {Colors.WARNING}⚠️  {intf['interface']} ({intf['protocol']}){Colors.ENDC}\n"
+                        f"    Risk Score: {intf['risk_score']}/100\n")
                     for issue in intf['issues']:
-                        print_issue(issue)
+                        out(format_issue(issue))
                 else:
-                    print(f"  {Colors.OKGREEN}✓{Colors.ENDC} {intf['interface']} ({intf['protocol']})")
+                    out(f"  {Colors.OKGREEN}✓{Colors.ENDC} {intf['interface']} ({intf['protocol']})\n")
             
         except Exception as e:
-            print(f"  {Colors.FAIL}Error analyzing {config_file}: {e}{Colors.ENDC}")
+            out(f"  {Colors.FAIL}Error analyzing {config_file}: {e}{Colors.ENDC}\n")
+        
+        finally:
+            sys.stdout.write(buf.getvalue())
     
-    return {
-        'analysis_type': 'FHRP',
-        'timestamp': datetime.now().isoformat(),
-        'devices': all_results,
-        'summary': _calculate_fhrp_summary(all_results)
-    }
+    sys.stdout.flush()
 
 
-def analyze_bgp(config_files: List[str]) -> Dict[str, Any]:
-    """Analyze BGP configurations across all devices"""
+def analyze_bgp(config_files: List[str], sidecar: str, errors: Dict[str, Exception]):
+    """Report BGP configurations across all devices, reading results back from the sidecar"""
     print_header("BGP SECURITY AUDIT")
     
-    all_results = []
-    
-    for config_file in config_files:
-        print_subheader(f"Analyzing: {os.path.basename(config_file)}")
+    for config_file, result in iter_sidecar(config_files, sidecar, errors):
+        # Buffer each device's report and write it to stdout once
+        buf = io.StringIO()
+        out = buf.write
+        out(format_subheader(f"Analyzing: {os.path.basename(config_file)}"))
         
         try:
-            auditor = BGPAuditor(config_file)
-            result = auditor.audit_bgp_config()
-            all_results.append(result)
+            if isinstance(result, Exception):
+                raise result
             
             if not result['bgp_configured']:
-                print(f"  ℹ️  {result['message']}")
+                out(f"  ℹ️  {result['message']}\n")
                 continue
             
             # Print summary for this device
@@ -134,109 +258,121 @@ def analyze_bgp(config_files: List[str]) -> Dict[str, Any]:
             
             compliance_color = Colors.OKGREEN if compliance_pct == 100 else Colors.WARNING if compliance_pct >= 50 else Colors.FAIL
             
-            print(f"  Device: {Colors.BOLD}{device}{Colors.ENDC}")
-            print(f"  ASN: {asn}")
-            print(f"  Total Neighbors: {total}")
-            print(f"  Compliant: {compliant}/{total}")
-            print(f"  Compliance: {compliance_color}{compliance_pct}%{Colors.ENDC}")
+            out(f"  Device: {Colors.BOLD}{device}{Colors.ENDC}\n"
+                f"  ASN: {asn}\n"
+                f"  Total Neighbors: {total}\n"
+                f"  Compliant: {compliant}/{total}\n"
+                f"  Compliance: {compliance_color}{compliance_pct}%{Colors.ENDC}\n")
             
             # Print global issues
             if result['global_config']['issues']:
-                print(f"\n  {Colors.WARNING}⚠️  Global BGP Configuration Issues{Colors.ENDC}")
+                out(f"\n  {Colors.WARNING}⚠️  Global BGP Configuration Issues{Colors.ENDC}\n")
                 for issue in result['global_config']['issues']:
-                    print_issue(issue)
+                    out(format_issue(issue))
             
             # Print neighbor issues
             for neighbor in result['neighbors']:
                 if not neighbor['compliant']:
-                    print(f"\n  {Colors.WARNING}⚠️  Neighbor {neighbor['neighbor']} (AS {neighbor['remote_as']}){Colors.ENDC}")
-                    print(f"    Risk Score: {neighbor['risk_score']}/100")
+                    out(f"\n  {Colors.WARNING}⚠️  Neighbor {neighbor['neighbor']} (AS {neighbor['remote_as']}){Colors.ENDC}\n"
+                        f"    Risk Score: {neighbor['risk_score']}/100\n")
                     for issue in neighbor['issues']:
-                        print_issue(issue)
+                        out(format_issue(issue))
                 else:
-                    print(f"  {Colors.OKGREEN}✓{Colors.ENDC} Neighbor {neighbor['neighbor']} (AS {neighbor['remote_as']})")
+                    out(f"  {Colors.OKGREEN}✓{Colors.ENDC} Neighbor {neighbor['neighbor']} (AS {neighbor['remote_as']})\n")
             
         except Exception as e:
-            print(f"  {Colors.FAIL}Error analyzing {config_file}: {e}{Colors.ENDC}")
+            out(f"  {Colors.FAIL}Error analyzing {config_file}: {e}{Colors.ENDC}\n")
+        
+        finally:
+            sys.stdout.write(buf.getvalue())
     
-    return {
-        'analysis_type': 'BGP',
-        'timestamp': datetime.now().isoformat(),
-        'devices': all_results,
-        'summary': _calculate_bgp_summary(all_results)
-    }
+    sys.stdout.flush()
 
 
-def _calculate_fhrp_summary(results: List[Dict]) -> Dict[str, Any]:
-    """Calculate summary statistics for FHRP audit"""
-    total_devices = len([r for r in results if r['total_fhrp_interfaces'] > 0])
-    total_interfaces = sum(r['total_fhrp_interfaces'] for r in results)
-    compliant_interfaces = sum(r['compliant_interfaces'] for r in results)
-    
-    # Collect all issues
-    all_issues = []
-    for result in results:
-        for intf in result.get('interfaces', []):
-            all_issues.extend(intf['issues'])
-    
-    # Count by severity
-    severity_counts = {
-        'CRITICAL': len([i for i in all_issues if i['severity'] == 'CRITICAL']),
-        'HIGH': len([i for i in all_issues if i['severity'] == 'HIGH']),
-        'MEDIUM': len([i for i in all_issues if i['severity'] == 'MEDIUM']),
-        'LOW': len([i for i in all_issues if i['severity'] == 'LOW'])
-    }
+_EMPTY_SEV = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+
+
+def _count_severities(sev: Counter) -> Tuple[Dict[str, int], int]:
+    """Per-severity counts and total number of issues from a severity Counter"""
+    severity_counts = dict(_EMPTY_SEV)
+    severity_counts.update((k, n) for k, n in sev.items() if k in severity_counts)
+    return severity_counts, sum(sev.values())
+
+
+class FHRPSummary:
+    """Running FHRP audit summary, updated one device result at a time"""
     
-    return {
-        'total_devices_with_fhrp': total_devices,
-        'total_fhrp_interfaces': total_interfaces,
-        'compliant_interfaces': compliant_interfaces,
-        'overall_compliance_pct': round((compliant_interfaces / total_interfaces * 100), 2) if total_interfaces > 0 else 0,
-        'issues_by_severity': severity_counts,
-        'total_issues': len(all_issues)
-    }
+    def __init__(self):
+        self.total_devices = 0
+        self.total_interfaces = 0
+        self.compliant_interfaces = 0
+        self.severities = Counter()
+    
+    def add(self, result: Dict[str, Any]):
+        """Fold one device's FHRP result into the totals"""
+        self.total_devices += result['total_fhrp_interfaces'] > 0
+        self.total_interfaces += result['total_fhrp_interfaces']
+        self.compliant_interfaces += result['compliant_interfaces']
+        self.severities.update(i['severity'] for intf in result.get('interfaces', []) for i in intf['issues'])
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary statistics for the FHRP audit"""
+        severity_counts, total_issues = _count_severities(self.severities)
+        total_interfaces = self.total_interfaces
+        compliant_interfaces = self.compliant_interfaces
+        
+        return {
+            'total_devices_with_fhrp': self.total_devices,
+            'total_fhrp_interfaces': total_interfaces,
+            'compliant_interfaces': compliant_interfaces,
+            'overall_compliance_pct': round((compliant_interfaces / total_interfaces * 100), 2) if total_interfaces > 0 else 0,
+            'issues_by_severity': severity_counts,
+            'total_issues': total_issues
+        }
 
 
-def _calculate_bgp_summary(results: List[Dict]) -> Dict[str, Any]:
-    """Calculate summary statistics for BGP audit"""
-    total_devices = len([r for r in results if r.get('bgp_configured', False)])
-    total_neighbors = sum(r.get('total_neighbors', 0) for r in results if r.get('bgp_configured', False))
-    compliant_neighbors = sum(r.get('compliant_neighbors', 0) for r in results if r.get('bgp_configured', False))
+class BGPSummary:
+    """Running BGP audit summary, updated one device result at a time"""
+    
+    def __init__(self):
+        self.total_devices = 0
+        self.total_neighbors = 0
+        self.compliant_neighbors = 0
+        self.severities = Counter()
     
-    # Collect all issues
-    all_issues = []
-    for result in results:
+    def add(self, result: Dict[str, Any]):
+        """Fold one device's BGP result into the totals; devices without BGP are skipped"""
         if not result.get('bgp_configured', False):
-            continue
-        for neighbor in result.get('neighbors', []):
-            all_issues.extend(neighbor['issues'])
-        # Add global issues
-        all_issues.extend(result.get('global_config', {}).get('issues', []))
-    
-    # Count by severity
-    severity_counts = {
-        'CRITICAL': len([i for i in all_issues if i['severity'] == 'CRITICAL']),
-        'HIGH': len([i for i in all_issues if i['severity'] == 'HIGH']),
-        'MEDIUM': len([i for i in all_issues if i['severity'] == 'MEDIUM']),
-        'LOW': len([i for i in all_issues if i['severity'] == 'LOW'])
-    }
+            return
+        self.total_devices += 1
+        self.total_neighbors += result.get('total_neighbors', 0)
+        self.compliant_neighbors += result.get('compliant_neighbors', 0)
+        
+        # Neighbor and global issues both count towards the severity totals
+        self.severities.update(i['severity'] for n in result.get('neighbors', []) for i in n['issues'])
+        self.severities.update(i['severity'] for i in result.get('global_config', {}).get('issues', []))
     
-    return {
-        'total_devices_with_bgp': total_devices,
-        'total_bgp_neighbors': total_neighbors,
-        'compliant_neighbors': compliant_neighbors,
-        'overall_compliance_pct': round((compliant_neighbors / total_neighbors * 100), 2) if total_neighbors > 0 else 0,
-        'issues_by_severity': severity_counts,
-        'total_issues': len(all_issues)
-    }
+    def as_dict(self) -> Dict[str, Any]:
+        """Summary statistics for the BGP audit"""
+        severity_counts, total_issues = _count_severities(self.severities)
+        total_neighbors = self.total_neighbors
+        compliant_neighbors = self.compliant_neighbors
+        
+        return {
+            'total_devices_with_bgp': self.total_devices,
+            'total_bgp_neighbors': total_neighbors,
+            'compliant_neighbors': compliant_neighbors,
+            'overall_compliance_pct': round((compliant_neighbors / total_neighbors * 100), 2) if total_neighbors > 0 else 0,
+            'issues_by_severity': severity_counts,
+            'total_issues': total_issues
+        }
 
 
-def print_final_summary(fhrp_results: Dict, bgp_results: Dict):
+def print_final_summary(fhrp_summary: Dict, bgp_summary: Dict):
     """Print final summary of all audits"""
     print_header("OVERALL AUDIT SUMMARY")
     
     # FHRP Summary
-    fhrp_summary = fhrp_results['summary']
     print_subheader("FHRP Summary")
     print(f"  Devices with FHRP: {fhrp_summary['total_devices_with_fhrp']}")
     print(f"  Total FHRP Interfaces: {fhrp_summary['total_fhrp_interfaces']}")
@@ -249,7 +385,6 @@ def print_final_summary(fhrp_results: Dict, bgp_results: Dict):
     print(f"    - Low: {fhrp_summary['issues_by_severity']['LOW']}")
     
     # BGP Summary
-    bgp_summary = bgp_results['summary']
     print_subheader("BGP Summary")
     print(f"  Devices with BGP: {bgp_summary['total_devices_with_bgp']}")
     print(f"  Total BGP Neighbors: {bgp_summary['total_bgp_neighbors']}")
@@ -266,6 +401,15 @@ def print_final_summary(fhrp_results: Dict, bgp_results: Dict):
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='CiscoConfParse FHRP/BGP audit')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes used to audit config files (default: CPU count)')
+    args = parser.parse_args()
+    
+    # One logical start time for every report and output filename
+    run_start = datetime.now()
+    run_iso = run_start.isoformat()
+    
     # Get config directory from environment or use default
     configs_dir = os.environ.get('CONFIGS_DIR', '/configs')
     output_dir = os.environ.get('OUTPUT_DIR', '/app/output')
@@ -273,8 +417,13 @@ def main():
     # Create output directory if it doesn't exist
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
-    # Find all .cfg files
-    config_files = glob.glob(os.path.join(configs_dir, '*.cfg'))
+    # Find all .cfg files, sorted for deterministic report order
+    try:
+        with os.scandir(configs_dir) as entries:
+            config_files = [e.path for e in entries if e.is_file() and e.name.endswith('.cfg')]
+    except FileNotFoundError:
+        config_files = []
+    config_files.sort()
     
     if not config_files:
         print(f"{Colors.FAIL}No .cfg files found in {configs_dir}{Colors.ENDC}")
@@ -284,40 +433,61 @@ def main():
     for cf in config_files:
         print(f"  - {os.path.basename(cf)}")
     
+    # Each device result goes to its ND-JSON sidecar as soon as it is audited;
+    # only the running summaries and failed audits stay in memory
+    timestamp = run_start.strftime('%Y%m%d_%H%M%S')
+    fhrp_devices_output = os.path.join(output_dir, f'fhrp_devices_{timestamp}.jsonl')
+    bgp_devices_output = os.path.join(output_dir, f'bgp_devices_{timestamp}.jsonl')
+    summaries = {'fhrp': FHRPSummary(), 'bgp': BGPSummary()}
+    
+    with open(fhrp_devices_output, 'wb') as fhrp_devices, open(bgp_devices_output, 'wb') as bgp_devices:
+        errors = stream_device_results(config_files, args.jobs,
+                                       {'fhrp': fhrp_devices, 'bgp': bgp_devices}, summaries)
+    
     # Run FHRP audit
-    fhrp_results = analyze_fhrp(config_files)
+    analyze_fhrp(config_files, fhrp_devices_output, errors['fhrp'])
     
     # Run BGP audit
-    bgp_results = analyze_bgp(config_files)
+    analyze_bgp(config_files, bgp_devices_output, errors['bgp'])
+    
+    fhrp_summary = summaries['fhrp'].as_dict()
+    bgp_summary = summaries['bgp'].as_dict()
     
     # Print final summary
-    print_final_summary(fhrp_results, bgp_results)
+    print_final_summary(fhrp_summary, bgp_summary)
     
-    # Save results to JSON files
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    # Save results to JSON files; device lists are copied from the sidecars
+    fhrp_results = {
+        'analysis_type': 'FHRP',
+        'timestamp': run_iso,
+        'devices': Path(fhrp_devices_output),
+        'summary': fhrp_summary
+    }
+    bgp_results = {
+        'analysis_type': 'BGP',
+        'timestamp': run_iso,
+        'devices': Path(bgp_devices_output),
+        'summary': bgp_summary
+    }
     
     fhrp_output = os.path.join(output_dir, f'fhrp_audit_{timestamp}.json')
-    with open(fhrp_output, 'w') as f:
-        json.dump(fhrp_results, f, indent=2)
+    write_json(fhrp_output, fhrp_results)
     print(f"{Colors.OKGREEN}✓{Colors.ENDC} FHRP audit saved to: {fhrp_output}")
     
     bgp_output = os.path.join(output_dir, f'bgp_audit_{timestamp}.json')
-    with open(bgp_output, 'w') as f:
-        json.dump(bgp_results, f, indent=2)
+    write_json(bgp_output, bgp_results)
     print(f"{Colors.OKGREEN}✓{Colors.ENDC} BGP audit saved to: {bgp_output}")
     
     # Save combined report
     combined_report = {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': run_iso,
         'fhrp_audit': fhrp_results,
         'bgp_audit': bgp_results
     }
     
     combined_output = os.path.join(output_dir, f'combined_audit_{timestamp}.json')
-    with open(combined_output, 'w') as f:
-        json.dump(combined_report, f, indent=2)
+    write_json(combined_output, combined_report)
     print(f"{Colors.OKGREEN}✓{Colors.ENDC} Combined audit saved to: {combined_output}")
 
-
 if __name__ == '__main__':
     main()
@@ -8,14 +8,23 @@ Connects to network devices via SSH using Netmiko and collects:
 """
 
 import os
+import re
 import sys
+import uuid
 import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from netmiko import ConnectHandler
 from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
 import logging
 
+# libyaml-backed loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader, CDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, Dumper as _Dumper
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +37,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+_RE_RUNNING_CONFIG_FILTER = re.compile(r'^show running-config \| (include|section) (.+)$')
+
+
+def _filter_running_config(config, command):
+    """Derive 'show running-config | include/section <regex>' output from the full config
+    
+    Returns None for any other command.
+    """
+    match = _RE_RUNNING_CONFIG_FILTER.match(command)
+    if not match:
+        return None
+    
+    mode, pattern = match.groups()
+    regex = re.compile(pattern)
+    lines = config.splitlines()
+    if mode == 'include':
+        return '\n'.join(line for line in lines if regex.search(line))
+    
+    # section: matching top-level lines plus their indented children
+    section = []
+    in_block = False
+    for line in lines:
+        if line[:1] in (' ', '\t'):
+            if in_block:
+                section.append(line)
+        else:
+            in_block = bool(regex.search(line))
+            if in_block:
+                section.append(line)
+    return '\n'.join(section)
+
+
 class DeviceCollector:
     """Collect configuration and show outputs from network devices"""
     
@@ -41,17 +82,32 @@ class DeviceCollector:
         self.show_dir = self.output_dir / 'show-outputs' / self.timestamp
         self.config_dir.mkdir(parents=True, exist_ok=True)
         self.show_dir.mkdir(parents=True, exist_ok=True)
+        self._known_subdirs = set()
         
         # Load inventory
-        self.devices = self._load_inventory()
+        inventory = self._load_inventory()
+        self.devices = inventory.get('devices', [])
+        
+        # Devices collected at once; collection is SSH-bound so threads suffice
+        # A missing or null max_concurrency means the default of 32
+        configured = inventory.get('max_concurrency')
+        try:
+            max_concurrency = 32 if configured is None else int(configured)
+        except (TypeError, ValueError):
+            max_concurrency = 0
+        if max_concurrency < 1:
+            logger.error(f"Invalid max_concurrency {configured!r} in "
+                         f"{self.inventory_file}: expected a positive integer")
+            sys.exit(1)
+        self.max_concurrency = min(max_concurrency, len(self.devices) or 1)
     
     def _load_inventory(self):
         """Load device inventory from YAML file"""
         try:
             with open(self.inventory_file, 'r') as f:
-                inventory = yaml.safe_load(f)
+                inventory = yaml.load(f, Loader=_SafeLoader) or {}
             logger.info(f"Loaded {len(inventory.get('devices', []))} devices from inventory")
-            return inventory.get('devices', [])
+            return inventory
         except FileNotFoundError:
             logger.error(f"Inventory file {self.inventory_file} not found")
             sys.exit(1)
@@ -79,28 +135,34 @@ class DeviceCollector:
         """Save command output to file"""
         if subdir:
             save_dir = self.show_dir / subdir
-            save_dir.mkdir(exist_ok=True)
+            # Only the first save into each category needs the mkdir
+            if subdir not in self._known_subdirs:
+                save_dir.mkdir(exist_ok=True)
+                self._known_subdirs.add(subdir)
         else:
             save_dir = self.config_dir
         
         filepath = save_dir / f"{hostname}_{filename}"
-        with open(filepath, 'w') as f:
-            f.write(output)
+        filepath.write_bytes(output.encode('utf-8'))
         logger.info(f"Saved {filepath}")
     
     def collect_running_config(self, connection, hostname):
-        """Collect running configuration"""
+        """Collect running configuration, returning its text (None on failure)"""
         try:
             logger.info(f"Collecting running-config from {hostname}")
             config = connection.send_command('show running-config')
             self._save_output(hostname, config, 'running-config.txt')
-            return True
+            return config
         except Exception as e:
             logger.error(f"Error collecting config from {hostname}: {str(e)}")
-            return False
+            return None
     
-    def collect_show_outputs(self, connection, hostname, device_type):
-        """Collect various show command outputs"""
+    def collect_show_outputs(self, connection, hostname, device_type, running_config=None):
+        """Collect various show command outputs
+        
+        When running_config is given, 'show running-config | include/section' commands
+        are sliced from it locally instead of being run on the device again.
+        """
         
         # Define show commands based on device type
         if 'cisco_ios' in device_type or 'cisco_xe' in device_type:
@@ -171,23 +233,56 @@ class DeviceCollector:
                 ]
             }
         
-        # Collect outputs
+        # Collect outputs for every category in one pass
+        flat = [(category, command) for category, commands in show_commands.items() for command in commands]
+        logger.info(f"Collecting {len(flat)} show outputs from {hostname}")
+        derived = {}
+        if running_config is not None:
+            for _, command in flat:
+                output = _filter_running_config(running_config, command)
+                if output is not None:
+                    derived[command] = output
+        
+        outputs = self._run_show_commands(connection, hostname, device_type,
+                                          [c for _, c in flat if c not in derived])
+        outputs.update(derived)
+        
         results = {}
-        for category, commands in show_commands.items():
-            logger.info(f"Collecting {category} outputs from {hostname}")
-            for command in commands:
-                try:
-                    output = connection.send_command(command, delay_factor=2)
-                    # Create safe filename from command
-                    filename = command.replace(' ', '_').replace('|', '_pipe_') + '.txt'
-                    self._save_output(hostname, output, filename, subdir=category)
-                    results[command] = 'success'
-                except Exception as e:
-                    logger.error(f"Error running '{command}' on {hostname}: {str(e)}")
-                    results[command] = f'failed: {str(e)}'
+        for category, command in flat:
+            output = outputs[command]
+            if isinstance(output, Exception):
+                logger.error(f"Error running '{command}' on {hostname}: {str(output)}")
+                results[command] = f'failed: {str(output)}'
+                continue
+            # Create safe filename from command
+            filename = command.replace(' ', '_').replace('|', '_pipe_') + '.txt'
+            self._save_output(hostname, output, filename, subdir=category)
+            results[command] = 'success'
         
         return results
     
+    def _run_show_commands(self, connection, hostname, device_type, commands):
+        """Run show commands one at a time, returning command -> output (or the exception raised)
+        
+        On IOS/IOS-XE the prompt is looked up once and passed as expect_string, so
+        send_command does not re-detect it before every command.
+        """
+        expect_string = None
+        if 'cisco_ios' in device_type or 'cisco_xe' in device_type:
+            try:
+                expect_string = re.escape(connection.find_prompt())
+            except Exception as e:
+                logger.warning(f"Could not read prompt on {hostname}: {str(e)}")
+        
+        outputs = {}
+        for command in commands:
+            try:
+                outputs[command] = connection.send_command(command, expect_string=expect_string,
+                                                           delay_factor=2)
+            except Exception as e:
+                outputs[command] = e
+        return outputs
+    
     def process_device(self, device):
         """Process a single device - collect config and show outputs"""
         hostname = device.get('hostname', device.get('host', 'unknown'))
@@ -204,7 +299,14 @@ class DeviceCollector:
             'secret': device.get('secret', os.environ.get('NET_SECRET', '')),
             'port': device.get('port', 22),
             'timeout': device.get('timeout', 30),
-            'session_log': f'netmiko_{hostname}.log',
+            # Tight prompt scanning; keepalive avoids mid-collection drops
+            'fast_cli': device.get('fast_cli', True),
+            'global_delay_factor': 1,
+            'keepalive': 30,
+            'conn_timeout': 10,
+            'banner_timeout': 10,
+            # Unique suffix so concurrent sessions never share a log file
+            'session_log': f'netmiko_{hostname}_{uuid.uuid4().hex[:8]}.log',
         }
         
         # Handle key-based authentication if specified
@@ -223,13 +325,15 @@ class DeviceCollector:
                 connection.enable()
             
             # Collect running config
-            config_success = self.collect_running_config(connection, hostname)
+            running_config = self.collect_running_config(connection, hostname)
+            config_success = running_config is not None
             
             # Collect show outputs
             show_results = self.collect_show_outputs(
                 connection, 
                 hostname, 
-                device_params['device_type']
+                device_params['device_type'],
+                running_config=running_config
             )
             
             return {
@@ -251,12 +355,14 @@ class DeviceCollector:
         """Run collection for all devices in inventory"""
         logger.info(f"\nStarting collection run at {datetime.now()}")
         logger.info(f"Output directory: {self.output_dir}")
-        logger.info(f"Processing {len(self.devices)} devices\n")
+        logger.info(f"Processing {len(self.devices)} devices "
+                    f"({self.max_concurrency} at a time)\n")
         
         results = []
-        for device in self.devices:
-            result = self.process_device(device)
-            results.append(result)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as ex:
+            futures = {ex.submit(self.process_device, device): device for device in self.devices}
+            for future in as_completed(futures):
+                results.append(future.result())
         
         # Summary
         logger.info(f"\n{'='*60}")
@@ -315,7 +421,7 @@ def create_sample_inventory():
     }
     
     with open('inventory.yaml', 'w') as f:
-        yaml.dump(sample_inventory, f, default_flow_style=False)
+        yaml.dump(sample_inventory, f, Dumper=_Dumper, default_flow_style=False)
     
     print("Sample inventory.yaml created")
     print("Edit this file with your device details before running collection")
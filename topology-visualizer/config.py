@@ -4,7 +4,8 @@ Configuration for Enhanced 3D Network Topology Visualization
 Defines Z-layers, lanes, icons, and datacenter mappings
 """
 
-from typing import Dict, List, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
 
 # =============================================================================
 # DATACENTER DEFINITIONS
@@ -31,8 +32,9 @@ DATACENTERS = [
 
 # Position codes that map to Z-layers in the 3D visualization
 # Higher Z values appear higher in the 3D space
+# Read-only (MappingProxyType) so hot loops can hold a local reference safely
 
-POSITION_TO_Z_LAYER: Dict[str, float] = {
+POSITION_TO_Z_LAYER: Mapping[str, float] = MappingProxyType({
     # Edge/Internet Layer (Z = 5.0)
     'igw': 5.0,    # Internet Gateway
     'pub': 4.5,    # Public DMZ
@@ -50,7 +52,7 @@ POSITION_TO_Z_LAYER: Dict[str, float] = {
     'wd': 1.0,     # Workstation Distribution
     'prv': 0.5,    # Private/Access
     'csh': 0.0,    # Customer/Site Hub
-}
+})
 
 
 # =============================================================================
@@ -59,8 +61,9 @@ POSITION_TO_Z_LAYER: Dict[str, float] = {
 
 # Lane assignment for X-axis positioning within each Z-layer
 # Lanes range from -10 to +10, with 0 being center
+# Read-only, like POSITION_TO_Z_LAYER
 
-POSITION_TO_LANE: Dict[str, int] = {
+POSITION_TO_LANE: Mapping[str, int] = MappingProxyType({
     # Internet/Edge devices spread across lanes
     'igw': 0,      # Internet Gateway - center
     'pub': 2,      # Public DMZ - right of center
@@ -78,7 +81,7 @@ POSITION_TO_LANE: Dict[str, int] = {
     'wd': -5,      # Workstation Distribution - far left
     'prv': 5,      # Private - far right
     'csh': 8,      # Customer Hub - far right
-}
+})
 
 
 # Lane spacing configuration
@@ -91,8 +94,8 @@ LANE_MAX = 10              # Maximum lane number
 # TYPE TO ICON/SYMBOL MAPPING
 # =============================================================================
 
-# Device type codes and their visual representation
-TYPE_TO_ICON: Dict[str, Dict[str, any]] = {
+# Device type codes and their visual representation (read-only mapping)
+TYPE_TO_ICON: Mapping[str, Dict[str, any]] = MappingProxyType({
     'sr': {
         'symbol': 'diamond',
         'size': 12,
@@ -117,7 +120,7 @@ TYPE_TO_ICON: Dict[str, Dict[str, any]] = {
         'color': '#95E1D3',     # Light teal
         'description': 'Load Balancer'
     }
-}
+})
 
 # Default icon for unknown types
 DEFAULT_ICON = {
@@ -140,6 +143,7 @@ HA_PAIR_OFFSET = 0.3        # Offset distance for HA pair visualization
 HA_PAIR_LINK_COLOR = '#FF6B6B'
 HA_PAIR_LINK_WIDTH = 2
 HA_PAIR_LINK_DASH = 'dash'
+HA_PAIR_BUCKETING = True    # Group by datacenter+position+type before pairing (near O(N))
 
 
 # =============================================================================
@@ -155,6 +159,9 @@ LANE_GUIDE_COLOR = '#F0F0F0'
 # Node label settings
 SHOW_NODE_LABELS = True
 NODE_LABEL_SIZE = 8
+# Above this many devices labels are dropped and names are shown on hover
+# only; per-node text labels dominate browser render time on large graphs
+MAX_NODE_LABELS = 200
 
 # Link type colors and styles
 LINK_STYLES = {
@@ -185,6 +192,16 @@ SPRING_K = 2.0              # Optimal distance between nodes
 SPRING_ITERATIONS = 100     # Number of iterations for layout algorithm
 SPRING_SEED = 42            # Random seed for reproducibility
 
+# Lanes with more nodes than this use Barnes-Hut repulsion (numba layout only);
+# cells narrower than BARNES_HUT_THETA x their distance count as one body
+BARNES_HUT_THRESHOLD = 30
+BARNES_HUT_THETA = 0.9
+
+# Minimize the FR energy with scipy's L-BFGS instead of iterating forces
+# (needs scipy; ignored without it)
+USE_LBFGS_LAYOUT = False
+LBFGS_MAX_ITER = 50
+
 # Y-axis spread factor (how much to spread nodes along Y axis)
 Y_AXIS_SPREAD = 3.0
 
@@ -214,6 +231,10 @@ def get_lane_x_position(lane: int) -> float:
     return lane * LANE_WIDTH
 
 
+# X-axis position of every valid lane (get_lane clamps to this range)
+LANE_X_POSITIONS = {lane: get_lane_x_position(lane) for lane in range(LANE_MIN, LANE_MAX + 1)}
+
+
 def are_ha_pair(device1: Dict, device2: Dict) -> bool:
     """
     Determine if two devices form an HA pair
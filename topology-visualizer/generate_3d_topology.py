@@ -4,17 +4,48 @@
 Generates interactive 3D topology from existing JSON files
 """
 
+import hashlib
 import json
-import networkx as nx
-import plotly.graph_objects as go
+import os
+import pickle
+import numpy as np
+import plotly.io as pio
+from plotly.offline import get_plotlyjs_version
 from pathlib import Path
 import sys
 import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_DIR = SCRIPT_DIR / 'output'
 
+# Above this many devices node names are shown on hover only; per-node text
+# labels dominate browser render time on large graphs
+MAX_NODE_LABELS = 200
+
+# Set TOPOLOGY_DEBUG=1 to list every device's parsed layer
+DEBUG = bool(os.environ.get('TOPOLOGY_DEBUG'))
+
+# Layers at least this large use the grid-approximated layout (dense
+# fr_layout needs O(n^2) time and memory per iteration)
+APPROX_LAYOUT_MIN_NODES = 500
+
+# Layers are laid out in worker processes when at least two are this large
+PARALLEL_LAYOUT_MIN_NODES = 200
+
+# Force-directed layout parameters shared by every backend
+LAYOUT_ITERATIONS = 100
+LAYOUT_K = 3
+LAYOUT_SEED = 42
+
+# Bump when the layout code changes so cached layouts are recomputed
+LAYOUT_VERSION = 1
+
+# Newest cached layouts kept in output/.layout_cache
+LAYOUT_CACHE_KEEP = 16
+
 # Add parsers to path
 sys.path.insert(0, str(SCRIPT_DIR / 'parsers'))
 
@@ -26,6 +57,41 @@ except ImportError:
     USE_HOSTNAME_PARSER = False
     print("Warning: hostname_parser not found, using simple classification")
 
+# orjson parses large topology files several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Page shell for the combined topology; the figure JSON is written straight
+# into it (same markup fig.write_html(include_plotlyjs='cdn') produces)
+HTML_HEAD = '''<!doctype html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <style>html, body {{height: 100%;}}</style>
+</head>
+<body>
+    <div style="height:100%; width:100%;">
+        <script>window.PlotlyConfig = {{MathJaxConfig: 'local'}};</script>
+        <script charset="utf-8" src="https://cdn.plot.ly/plotly-{version}.min.js"></script>
+        <div id="topology" class="plotly-graph-div" style="height:100%; width:100%;"></div>
+        <script>
+            window.PLOTLYENV = window.PLOTLYENV || {{}};
+            Plotly.newPlot("topology", '''
+HTML_TAIL = ''', {"responsive": true});
+        </script>
+    </div>
+</body>
+</html>
+'''
+
+# igraph's C Fruchterman-Reingold is used for layer layouts when installed
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
 
 def classify_device_simple(node_name, node_type):
     """Simple fallback classification based on node_type from CDP"""
@@ -39,156 +105,542 @@ def classify_device_simple(node_name, node_type):
     return z_levels.get(node_type, 1.5)
 
 
+def _cached_json(path):
+    """
+    Load a topology JSON file through a pickle sidecar
+    
+    The parsed data is pickled next to the source as <name>.pkl and reused
+    while it is at least as new as the JSON; a stale, unreadable or
+    unwritable sidecar just falls back to parsing the JSON.
+    """
+    cache = path.with_suffix('.pkl')
+    try:
+        if cache.stat().st_mtime >= path.stat().st_mtime:
+            with open(cache, 'rb') as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    
+    if orjson is not None:
+        data = orjson.loads(path.read_bytes())
+    else:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    
+    try:
+        with open(cache, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return data
+
+
 def load_topology_data():
-    """Load topology data from JSON files"""
-    graphs = {
-        'physical': nx.Graph(),
-        'hsrp': nx.Graph(),
-        'bgp': nx.DiGraph(),
-        'combined': nx.MultiGraph()
-    }
+    """
+    Load topology data from JSON files
+    
+    Returns:
+        Dict with 'nodes' (name -> CDP node_type, in first-seen order) and
+        one list of (source, target, attrs) edges per link type under
+        'physical', 'hsrp' and 'bgp'
+    """
+    topology = {'nodes': {}, 'physical': [], 'hsrp': [], 'bgp': []}
+    nodes = topology['nodes']
     
     # Load physical topology
     physical_file = OUTPUT_DIR / 'cdp_topology.json'
     if physical_file.exists():
-        with open(physical_file, 'r') as f:
-            data = json.load(f)
-            for node in data['nodes']:
-                for g in graphs.values():
-                    g.add_node(node['name'], node_type=node['type'])
-            for edge in data['edges']:
-                graphs['physical'].add_edge(edge['source'], edge['target'], link_type='physical')
-                graphs['combined'].add_edge(edge['source'], edge['target'], link_type='physical')
+        data = _cached_json(physical_file)
+        for node in data['nodes']:
+            nodes[node['name']] = node['type']
+        
+        physical_attrs = {'link_type': 'physical'}
+        topology['physical'] = [(edge['source'], edge['target'], physical_attrs) for edge in data['edges']]
     
     # Load HSRP topology
     hsrp_file = OUTPUT_DIR / 'hsrp_topology.json'
     if hsrp_file.exists():
-        with open(hsrp_file, 'r') as f:
-            data = json.load(f)
-            for edge in data['edges']:
-                graphs['hsrp'].add_edge(edge['source'], edge['target'], link_type='hsrp', group=edge.get('group'))
-                graphs['combined'].add_edge(edge['source'], edge['target'], link_type='hsrp', group=edge.get('group'))
+        data = _cached_json(hsrp_file)
+        topology['hsrp'] = [(edge['source'], edge['target'], {'link_type': 'hsrp', 'group': edge.get('group')})
+                            for edge in data['edges']]
     
     # Load BGP topology  
     bgp_file = OUTPUT_DIR / 'bgp_topology.json'
     if bgp_file.exists():
-        with open(bgp_file, 'r') as f:
-            data = json.load(f)
-            for edge in data['edges']:
-                graphs['bgp'].add_edge(edge['source'], edge['target'], 
-                                      link_type='bgp', 
-                                      peering_type=edge.get('type'))
-                graphs['combined'].add_edge(edge['source'], edge['target'], 
-                                           link_type='bgp',
-                                           peering_type=edge.get('type'))
+        data = _cached_json(bgp_file)
+        topology['bgp'] = [(edge['source'], edge['target'], {'link_type': 'bgp', 'peering_type': edge.get('type')})
+                           for edge in data['edges']]
+    
+    # Devices only seen as HSRP/BGP peers have no CDP type
+    for link_type in ('physical', 'hsrp', 'bgp'):
+        for u, v, _ in topology[link_type]:
+            nodes.setdefault(u, 'unknown')
+            nodes.setdefault(v, 'unknown')
+    
+    return topology
+
+
+def fr_layout(adj, iters, k, seed):
+    """
+    Fruchterman-Reingold force-directed layout on a dense adjacency matrix
+    
+    Same update rule, cooling schedule and seeding as nx.spring_layout, but
+    without the per-call graph conversion and with the (n, n) work buffers
+    allocated once instead of on every iteration.
     
-    return graphs
+    Args:
+        adj: (n, n) adjacency matrix
+        iters: Maximum number of iterations
+        k: Optimal distance between nodes
+        seed: Seed for the random initial positions
+    
+    Returns:
+        (n, 2) array of positions rescaled to [-1, 1]
+    """
+    n = adj.shape[0]
+    pos = np.random.RandomState(seed).rand(n, 2)
+    
+    # Initial temperature is ~0.1 of the domain; cool linearly to zero
+    t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1
+    dt = t / (iters + 1)
+    
+    delta = np.empty((n, n, 2))
+    dist = np.empty((n, n))
+    coeff = np.empty((n, n))
+    for _ in range(iters):
+        np.subtract(pos[:, None, :], pos[None, :, :], out=delta)
+        np.sqrt(np.einsum('ijk,ijk->ij', delta, delta), out=dist)
+        np.clip(dist, 0.01, None, out=dist)
+        
+        # Repulsion k^2/d minus attraction d^2/k, both along delta/d
+        np.divide(k * k, dist * dist, out=coeff)
+        coeff -= adj * dist / k
+        force = np.einsum('ijk,ij->ik', delta, coeff)
+        
+        length = np.clip(np.linalg.norm(force, axis=1), 0.01, None)
+        step = force * (t / length)[:, None]
+        pos += step
+        t -= dt
+        if np.linalg.norm(step) / n < 1e-4:
+            break
+    
+    return _rescale(pos)
+
+
+def fr_layout_grid(edges, n, iters, k, seed):
+    """
+    Fruchterman-Reingold layout with grid-approximated repulsion
+    
+    Each iteration buckets the nodes into a uniform grid over their bounding
+    box. Repulsion between nodes in the same or adjacent cells is computed
+    exactly; every farther cell acts as a single mass at its centroid
+    (a one-level Barnes-Hut). Attraction stays exact over the edge list.
+    With ~3*sqrt(n) cells this is O(n^1.5) per iteration instead of O(n^2),
+    and never allocates an (n, n) matrix.
+    
+    Args:
+        edges: (m, 2) integer array of node index pairs
+        n: Number of nodes
+        iters: Maximum number of iterations
+        k: Optimal distance between nodes
+        seed: Seed for the random initial positions
+    
+    Returns:
+        (n, 2) array of positions rescaled to [-1, 1]
+    """
+    pos = np.random.RandomState(seed).rand(n, 2)
+    src, dst = edges[:, 0], edges[:, 1]
+    
+    side = max(3, int(np.ceil(np.sqrt(3 * np.sqrt(n)))))
+    n_cells = side * side
+    cell_ix = np.arange(n_cells) // side
+    cell_iy = np.arange(n_cells) % side
+    neighbours = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+    
+    t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1
+    dt = t / (iters + 1)
+    
+    for _ in range(iters):
+        # Bucket nodes into cells over the current bounding box
+        lo = pos.min(axis=0)
+        h = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) / side + 1e-9
+        ix = np.minimum(((pos[:, 0] - lo[0]) / h).astype(np.intp), side - 1)
+        iy = np.minimum(((pos[:, 1] - lo[1]) / h).astype(np.intp), side - 1)
+        cell = ix * side + iy
+        
+        order = np.argsort(cell, kind='stable')
+        count = np.bincount(cell, minlength=n_cells)
+        start = np.cumsum(count) - count
+        
+        # Exact repulsion from nodes in the same and adjacent cells
+        ii, jj = [], []
+        for dx, dy in neighbours:
+            nx_, ny_ = ix + dx, iy + dy
+            valid = (nx_ >= 0) & (nx_ < side) & (ny_ >= 0) & (ny_ < side)
+            nb = np.where(valid, nx_ * side + ny_, 0)
+            cnt = np.where(valid, count[nb], 0)
+            total = cnt.sum()
+            if not total:
+                continue
+            first = np.cumsum(cnt) - cnt
+            within = np.arange(total) - np.repeat(first, cnt)
+            ii.append(np.repeat(np.arange(n), cnt))
+            jj.append(order[np.repeat(start[nb], cnt) + within])
+        ii = np.concatenate(ii)
+        jj = np.concatenate(jj)
+        keep = ii != jj
+        ii, jj = ii[keep], jj[keep]
+        
+        delta = pos[ii] - pos[jj]
+        dist2 = np.maximum(np.einsum('ij,ij->i', delta, delta), 1e-4)
+        rep = delta * (k * k / dist2)[:, None]
+        force = np.column_stack([
+            np.bincount(ii, weights=rep[:, 0], minlength=n),
+            np.bincount(ii, weights=rep[:, 1], minlength=n),
+        ])
+        
+        # Far cells repel as point masses at their centroids
+        safe = np.maximum(count, 1)
+        centroid = np.column_stack([
+            np.bincount(cell, weights=pos[:, 0], minlength=n_cells) / safe,
+            np.bincount(cell, weights=pos[:, 1], minlength=n_cells) / safe,
+        ])
+        far = ((np.abs(ix[:, None] - cell_ix[None, :]) > 1) |
+               (np.abs(iy[:, None] - cell_iy[None, :]) > 1))
+        cdelta = pos[:, None, :] - centroid[None, :, :]
+        cdist2 = np.maximum(np.einsum('ijk,ijk->ij', cdelta, cdelta), 1e-4)
+        weight = np.where(far, count[None, :] * (k * k) / cdist2, 0.0)
+        force += np.einsum('ijk,ij->ik', cdelta, weight)
+        
+        # Attraction d^2/k along each edge
+        delta = pos[src] - pos[dst]
+        dist = np.maximum(np.sqrt(np.einsum('ij,ij->i', delta, delta)), 0.01)
+        att = delta * (dist / k)[:, None]
+        for d in (0, 1):
+            force[:, d] -= np.bincount(src, weights=att[:, d], minlength=n)
+            force[:, d] += np.bincount(dst, weights=att[:, d], minlength=n)
+        
+        length = np.clip(np.linalg.norm(force, axis=1), 0.01, None)
+        step = force * (t / length)[:, None]
+        pos += step
+        t -= dt
+        if np.linalg.norm(step) / n < 1e-4:
+            break
+    
+    return _rescale(pos)
+
+
+def _rescale(pos):
+    """Center positions on the origin and scale the largest coordinate to 1"""
+    pos -= pos.mean(axis=0)
+    lim = np.abs(pos).max()
+    if lim > 0:
+        pos /= lim
+    return pos
+
 
+def _layer_adjacency(ij, n):
+    """Dense (n, n) adjacency matrix from an (m, 2) array of node index pairs"""
+    adj = np.zeros((n, n))
+    np.add.at(adj, (ij[:, 0], ij[:, 1]), 1.0)
+    off_diag = ij[:, 0] != ij[:, 1]
+    np.add.at(adj, (ij[off_diag, 1], ij[off_diag, 0]), 1.0)
+    return adj
+
+
+def _edge_index(topology, node_idx):
+    """
+    Link endpoints as index arrays, built once per topology
+    
+    Returns link type -> (m, 2) array of node_idx rows, shared by the layer
+    layout and the edge traces so node names are only looked up once.
+    """
+    return {
+        link_type: np.fromiter((node_idx[end] for u, v, _ in topology[link_type] for end in (u, v)),
+                               dtype=np.intp, count=2 * len(topology[link_type])).reshape(-1, 2)
+        for link_type in ('physical', 'hsrp', 'bgp')
+    }
+
+
+def _edges_by_layer(edge_ij, layer_of, name_rank):
+    """
+    Distinct intra-layer links across all link types
+    
+    Args:
+        edge_ij: Dict returned by _edge_index
+        layer_of: Array of layer numbers, one per node
+        name_rank: Array giving each node's position in name order
+    
+    Returns:
+        (m, 2) array of node index pairs, each oriented so u's name sorts
+        before v's, in first-seen order. Links
+        between layers and self-loops play no part in a layer's layout and
+        are dropped.
+    """
+    ij = np.concatenate(list(edge_ij.values()))
+    ij = ij[(ij[:, 0] != ij[:, 1]) & (layer_of[ij[:, 0]] == layer_of[ij[:, 1]])]
+    ij = np.where((name_rank[ij[:, 0]] < name_rank[ij[:, 1]])[:, None], ij, ij[:, ::-1])
+    _, first = np.unique(ij, axis=0, return_index=True)
+    return ij[np.sort(first)]
 
-def create_layered_3d_layout(graph):
-    """Create 3D layout with hierarchical layers using hostname parsing"""
+
+def _layer_xy(ij, n):
+    """
+    2D force-directed positions for one layer, rescaled to [-1, 1]
+    
+    Uses igraph when available, otherwise the NumPy fr_layout (or
+    fr_layout_grid for large layers); all start from the same seeded
+    random positions.
+    """
+    if n == 1:
+        return np.zeros((1, 2))
+    
+    if ig is not None:
+        start = np.random.RandomState(LAYOUT_SEED).rand(n, 2).tolist()
+        layout = ig.Graph(n=n, edges=ij.tolist()).layout_fruchterman_reingold(niter=LAYOUT_ITERATIONS, seed=start)
+        return _rescale(np.array(layout.coords, dtype=np.float64))
+    
+    if n >= APPROX_LAYOUT_MIN_NODES:
+        return fr_layout_grid(ij, n, iters=LAYOUT_ITERATIONS, k=LAYOUT_K, seed=LAYOUT_SEED)
+    return fr_layout(_layer_adjacency(ij, n), iters=LAYOUT_ITERATIONS, k=LAYOUT_K, seed=LAYOUT_SEED)
+
+
+def _layout_one(args):
+    """
+    Lay out one layer; top-level so it can run in a worker process
+    
+    Args:
+        args: (nodes, ij, z) - the layer's node names, its edges from
+            _index_pairs and its Z level
+    
+    Returns:
+        Dict of node -> (x, y, z)
+    """
+    nodes, ij, z = args
+    return {node: (x, y, z) for node, (x, y) in zip(nodes, _layer_xy(ij, len(nodes)).tolist())}
+
+
+def _layout_cache_path(jobs):
+    """
+    Cache file for a set of layer layout jobs
+    
+    The key covers every layer's nodes, edges and Z level, the layout
+    backend and its version, the layout parameters and LAYOUT_VERSION, so
+    any change to the topology, classification or layout settings misses.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    backend = f'igraph {ig.__version__}' if ig is not None else 'numpy'
+    h.update(repr((LAYOUT_VERSION, backend, LAYOUT_ITERATIONS, LAYOUT_K, LAYOUT_SEED,
+                   APPROX_LAYOUT_MIN_NODES)).encode())
+    for nodes, ij, z in jobs:
+        h.update(repr((len(nodes), ij.shape, z)).encode())
+        h.update('\0'.join(nodes).encode())
+        h.update(ij.tobytes())
+    return OUTPUT_DIR / '.layout_cache' / f'{h.hexdigest()}.npz'
+
+
+def _load_layout(path):
+    """Load a cached node -> (x, y, z) layout, or None if there is none"""
+    try:
+        with np.load(path) as data:
+            layout = dict(zip(data['nodes'].tolist(), map(tuple, data['xyz'].tolist())))
+        # Mark as recently used so pruning keeps it
+        os.utime(path)
+        return layout
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_layout(path, pos_3d):
+    """Write a node -> (x, y, z) layout to the cache; failures are ignored"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, nodes=np.array(list(pos_3d), dtype=str),
+                 xyz=np.array(list(pos_3d.values()), dtype=np.float64).reshape(-1, 3))
+        _prune_layouts(path.parent)
+    except OSError:
+        pass
+
+
+def _prune_layouts(cache_dir):
+    """Delete all but the LAYOUT_CACHE_KEEP most recently used cached layouts"""
+    entries = sorted(cache_dir.glob('*.npz'), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for stale in entries[LAYOUT_CACHE_KEEP:]:
+        stale.unlink()
+
+
+def create_layered_3d_layout(topology, edge_ij=None):
+    """
+    Create 3D layout with hierarchical layers using hostname parsing
+    
+    Args:
+        topology: Dict returned by load_topology_data
+        edge_ij: Optional _edge_index result for topology['nodes'] order,
+            computed here if not given
+    
+    Returns:
+        (pos_3d, node_layers): node -> (x, y, z) and node -> layer name, so
+        callers can color by layer without parsing each hostname again
+    """
     pos_3d = {}
+    node_layers = {}
     
     if USE_HOSTNAME_PARSER:
         print("Using hostname-based layer classification...")
         parser = HostnameParser()
-        
-        # Group nodes by parsed layer
-        nodes_by_layer = {}
-        for node in graph.nodes():
+    else:
+        print("Using simple node_type classification...")
+    
+    # Group nodes by layer
+    nodes_by_layer = defaultdict(lambda: {'nodes': [], 'idx': [], 'z': None})
+    debug_lines = []
+    for i, (node, node_type) in enumerate(topology['nodes'].items()):
+        if USE_HOSTNAME_PARSER:
             # Parse hostname to get layer
             parsed = parser.parse(node)
             layer = parsed['layer']
             z_level = parsed['z_level']
             
-            if layer not in nodes_by_layer:
-                nodes_by_layer[layer] = {'nodes': [], 'z': z_level}
-            nodes_by_layer[layer]['nodes'].append(node)
-            
-            # Debug output
-            if parsed['valid']:
-                print(f"  {node:20} → {parsed['location']:4}-{parsed['role']:3}-{parsed['type']:2} → Layer: {layer:12} (Z={z_level})")
-            else:
-                print(f"  {node:20} → UNPARSED → Layer: {layer:12} (Z={z_level})")
-    else:
-        print("Using simple node_type classification...")
-        # Fallback: group by node_type from CDP
-        nodes_by_layer = {}
-        for node in graph.nodes():
-            node_type = graph.nodes[node].get('node_type', 'unknown')
-            z_level = classify_device_simple(node, node_type)
+            # Debug output, printed in one block after the loop
+            if DEBUG:
+                if parsed['valid']:
+                    desc = f"{parsed['location']:4}-{parsed['role']:3}-{parsed['type']:2}"
+                else:
+                    desc = 'UNPARSED'
+                debug_lines.append(f"  {node:20} → {desc} → Layer: {layer:12} (Z={z_level})")
+        else:
+            # Fallback: group by node_type from CDP
             layer = node_type
-            
-            if layer not in nodes_by_layer:
-                nodes_by_layer[layer] = {'nodes': [], 'z': z_level}
-            nodes_by_layer[layer]['nodes'].append(node)
+            z_level = classify_device_simple(node, node_type)
+        
+        node_layers[node] = layer
+        entry = nodes_by_layer[layer]
+        entry['nodes'].append(node)
+        entry['idx'].append(i)
+        entry['z'] = z_level
+    
+    if debug_lines:
+        print('\n'.join(debug_lines))
     
     print(f"\nLayer distribution:")
     for layer, data in sorted(nodes_by_layer.items(), key=lambda x: x[1]['z'], reverse=True):
         print(f"  Z={data['z']}: {layer:12} - {len(data['nodes'])} devices")
     
-    # Use 2D spring layout for X,Y coordinates per layer
-    for layer, data in nodes_by_layer.items():
-        nodes = data['nodes']
-        z = data['z']
-        
-        if not nodes:
-            continue
-        
-        # Create subgraph for this layer
-        subgraph = graph.subgraph(nodes)
-        
-        # Get 2D positions with more spacing
-        if len(nodes) > 1:
-            pos_2d = nx.spring_layout(subgraph, k=3, iterations=100, seed=42)
-        else:
-            pos_2d = {nodes[0]: (0, 0)}
-        
-        # Add Z coordinate
-        for node in nodes:
-            x, y = pos_2d[node]
-            pos_3d[node] = (x, y, z)
+    # Use 2D force-directed layout for X,Y coordinates per layer; layers are
+    # independent, so large ones run in parallel worker processes
+    if edge_ij is None:
+        edge_ij = _edge_index(topology, {node: i for i, node in enumerate(topology['nodes'])})
+    layer_of = np.empty(len(node_layers), dtype=np.intp)
+    local = np.empty(len(node_layers), dtype=np.intp)
+    for code, data in enumerate(nodes_by_layer.values()):
+        layer_of[data['idx']] = code
+        local[data['idx']] = np.arange(len(data['idx']))
+    name_rank = np.argsort(np.argsort(np.array(list(topology['nodes']), dtype=str)))
+    pairs = _edges_by_layer(edge_ij, layer_of, name_rank)
+    pair_layer = layer_of[pairs[:, 0]]
+    
+    # Each layer's links as indices into its own node list
+    jobs = [(data['nodes'], local[pairs[pair_layer == code]], data['z'])
+            for code, data in enumerate(nodes_by_layer.values())]
     
-    return pos_3d
+    # Reuse the last layout computed for exactly this topology
+    cache_path = _layout_cache_path(jobs)
+    cached = _load_layout(cache_path)
+    if cached is not None:
+        print(f"  Reusing cached layout {cache_path.name}")
+        return cached, node_layers
+    
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers > 1 and sum(len(job[0]) >= PARALLEL_LAYOUT_MIN_NODES for job in jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for layer_pos in executor.map(_layout_one, jobs):
+                pos_3d.update(layer_pos)
+    else:
+        for job in jobs:
+            pos_3d.update(_layout_one(job))
+    
+    _save_layout(cache_path, pos_3d)
+    return pos_3d, node_layers
+
+
+def _edge_segments(ij, P):
+    """
+    Line-segment coordinates for an (E, 2) array of node index pairs
+    
+    Returns a (3*E, 3) array of [start, end, NaN-gap] rows, the layout
+    Plotly expects for disconnected line segments in one trace.
+    """
+    xyz = np.full((len(ij) * 3, 3), np.nan)
+    xyz[0::3] = P[ij[:, 0]]
+    xyz[1::3] = P[ij[:, 1]]
+    return xyz
 
 
-def visualize_3d_topology(graphs):
+def _figure_json(fig):
+    """
+    Serialize a figure dict of plain Python/NumPy values
+    
+    Returns the JSON as bytes. NaN gaps in edge coordinates come out as null
+    (orjson) or NaN (json), both of which plotly.js treats as a line break.
+    """
+    if orjson is not None:
+        # Column slices of the coordinate arrays are strided; orjson only
+        # serializes contiguous arrays natively
+        data = orjson.dumps(fig, default=np.ascontiguousarray,
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        data = json.dumps(fig, default=lambda a: a.tolist()).encode()
+    # Keep device names from closing the <script> tag early
+    return data.replace(b'</', b'<\\/')
+
+
+def _write_figure_html(output_file, traces, layout):
+    """
+    Write traces and layout dicts to a standalone HTML page
+    
+    Bypasses go.Figure, whose validation of every trace property dominates
+    write time for large topologies. Traces must be complete plotly.js trace
+    dicts (including 'type'); the default Plotly template is filled in so the
+    page renders the same as fig.write_html would.
+    """
+    layout = dict(layout)
+    layout.setdefault('template', pio.templates[pio.templates.default].to_plotly_json())
+    
+    with open(output_file, 'wb') as f:
+        f.write(HTML_HEAD.format(version=get_plotlyjs_version()).encode())
+        f.write(_figure_json(traces))
+        f.write(b', ')
+        f.write(_figure_json(layout))
+        f.write(HTML_TAIL.encode())
+
+
+def visualize_3d_topology(topology):
     """Create 3D interactive visualization"""
-    combined_graph = graphs['combined']
+    # Link endpoints as node indices (load order), shared with the layout
+    nodes_list = list(topology['nodes'])
+    node_idx = {n: i for i, n in enumerate(nodes_list)}
+    edge_ij = _edge_index(topology, node_idx)
     
     # Create 3D layout
     print("\nCreating 3D layout...")
-    pos_3d = create_layered_3d_layout(combined_graph)
-    
-    # Separate edges by type
-    physical_edges = []
-    hsrp_edges = []
-    bgp_edges = []
-    
-    for u, v, key, data in combined_graph.edges(data=True, keys=True):
-        link_type = data.get('link_type', 'physical')
-        if link_type == 'physical':
-            physical_edges.append((u, v, data))
-        elif link_type == 'hsrp':
-            hsrp_edges.append((u, v, data))
-        elif link_type == 'bgp':
-            bgp_edges.append((u, v, data))
+    pos_3d, node_layers = create_layered_3d_layout(topology, edge_ij)
+    
+    physical_edges = topology['physical']
+    hsrp_edges = topology['hsrp']
+    bgp_edges = topology['bgp']
+    
+    # Node coordinates as one (N, 3) array, rows in load order
+    P = np.array([pos_3d[n] for n in nodes_list], dtype=np.float64).reshape(-1, 3)
     
     traces = []
     
     # Physical links (gray solid lines)
     if physical_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in physical_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+        xyz = _edge_segments(edge_ij['physical'], P)
         
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2],
             mode='lines',
             line=dict(color='#CCCCCC', width=2),
             hoverinfo='none',
@@ -198,17 +650,11 @@ def visualize_3d_topology(graphs):
     
     # HSRP links (red dashed lines)
     if hsrp_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in hsrp_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+        xyz = _edge_segments(edge_ij['hsrp'], P)
         
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2],
             mode='lines',
             line=dict(color='#FF6B6B', width=4, dash='dash'),
             hoverinfo='none',
@@ -218,17 +664,11 @@ def visualize_3d_topology(graphs):
     
     # BGP links (blue lines)
     if bgp_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in bgp_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+        xyz = _edge_segments(edge_ij['bgp'], P)
         
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2],
             mode='lines',
             line=dict(color='#4ECDC4', width=3),
             hoverinfo='none',
@@ -237,10 +677,6 @@ def visualize_3d_topology(graphs):
         ))
     
     # Create nodes with colors by layer
-    node_x, node_y, node_z = [], [], []
-    node_text = []
-    node_color = []
-    
     color_map = {
         'router': '#FF6B6B',      # Red - Edge/Internet
         'core': '#4ECDC4',        # Teal - Core
@@ -249,30 +685,15 @@ def visualize_3d_topology(graphs):
         'unknown': '#AAAAAA'      # Gray - Unknown
     }
     
-    if USE_HOSTNAME_PARSER:
-        parser = HostnameParser()
-    
-    for node in combined_graph.nodes():
-        if node in pos_3d:
-            x, y, z = pos_3d[node]
-            node_x.append(x)
-            node_y.append(y)
-            node_z.append(z)
-            node_text.append(node)
-            
-            # Get layer from hostname parser or fallback to node_type
-            if USE_HOSTNAME_PARSER:
-                layer = parser.get_layer(node)
-            else:
-                layer = combined_graph.nodes[node].get('node_type', 'unknown')
-            
-            node_color.append(color_map.get(layer, '#AAAAAA'))
+    # Layer from the hostname parser or node_type, as classified for the layout
+    node_color = [color_map.get(node_layers[node], '#AAAAAA') for node in nodes_list]
     
     # Node trace
-    traces.append(go.Scatter3d(
-        x=node_x, y=node_y, z=node_z,
-        mode='markers+text',
-        text=node_text,
+    traces.append(dict(
+        type='scatter3d',
+        x=P[:, 0], y=P[:, 1], z=P[:, 2],
+        mode='markers+text' if len(nodes_list) <= MAX_NODE_LABELS else 'markers',
+        text=nodes_list,
         textposition='top center',
         textfont=dict(size=8, color='black'),
         marker=dict(
@@ -280,16 +701,13 @@ def visualize_3d_topology(graphs):
             color=node_color,
             line=dict(color='white', width=1)
         ),
-        hovertext=node_text,
+        hovertext=nodes_list,
         hoverinfo='text',
         name='Devices',
         showlegend=True
     ))
     
-    # Create figure
-    fig = go.Figure(data=traces)
-    
-    fig.update_layout(
+    layout = dict(
         title=dict(
             text='3D Network Topology - Layer-Based Layout<br><sub>Drag to rotate | Scroll to zoom</sub>',
             font=dict(size=18)
@@ -307,14 +725,14 @@ def visualize_3d_topology(graphs):
                 showgrid=False,
                 zeroline=False,
                 showticklabels=False,
-                title='',
+                title=dict(text=''),
                 showbackground=False
             ),
             yaxis=dict(
                 showgrid=False,
                 zeroline=False,
                 showticklabels=False,
-                title='',
+                title=dict(text=''),
                 showbackground=False
             ),
             zaxis=dict(
@@ -322,7 +740,7 @@ def visualize_3d_topology(graphs):
                 gridcolor='#E0E0E0',
                 zeroline=False,
                 showticklabels=True,
-                title='Network Layer',
+                title=dict(text='Network Layer'),
                 ticktext=['Access/Private', 'Distribution', 'Core', 'Edge/Internet'],
                 tickvals=[0, 1, 2, 3],
                 showbackground=True,
@@ -339,7 +757,7 @@ def visualize_3d_topology(graphs):
     
     # Save
     output_file = OUTPUT_DIR / 'combined_topology_3d.html'
-    fig.write_html(output_file)
+    _write_figure_html(output_file, traces, layout)
     print(f"\n✓ 3D topology visualization saved to {output_file}")
     
     return output_file
@@ -353,18 +771,19 @@ def main():
     
     # Load data
     print("Loading topology data...")
-    graphs = load_topology_data()
+    topology = load_topology_data()
     
-    if not graphs['combined'].nodes():
+    if not topology['nodes']:
         print("❌ No topology data found!")
         print("   Run: python run_pipeline_nxos.py first")
         return
     
-    print(f"  ✓ Loaded {len(graphs['combined'].nodes())} devices")
-    print(f"  ✓ Loaded {len(graphs['combined'].edges())} connections\n")
+    n_edges = len(topology['physical']) + len(topology['hsrp']) + len(topology['bgp'])
+    print(f"  ✓ Loaded {len(topology['nodes'])} devices")
+    print(f"  ✓ Loaded {n_edges} connections\n")
     
     # Generate 3D visualization
-    output_file = visualize_3d_topology(graphs)
+    output_file = visualize_3d_topology(topology)
     
     print("\n" + "="*60)
     print("  ✅ Complete!")
@@ -10,8 +10,10 @@ Generates interactive 3D topology with:
 """
 
 import json
+import os
 import networkx as nx
-import plotly.graph_objects as go
+import numpy as np
+import plotly.io as pio
 from pathlib import Path
 import sys
 from collections import defaultdict
@@ -20,16 +22,22 @@ from collections import defaultdict
 SCRIPT_DIR = Path(__file__).parent
 OUTPUT_DIR = SCRIPT_DIR / 'output'
 
+# Set TOPOLOGY_DEBUG=1 to list every device's parsed datacenter, lane and layer
+DEBUG = bool(os.environ.get('TOPOLOGY_DEBUG'))
+
 # Add parsers and config to path
 sys.path.insert(0, str(SCRIPT_DIR / 'parsers'))
 sys.path.insert(0, str(SCRIPT_DIR))
 
+# Per-lane spring layout (numba-compiled when available)
+from _spring_numba import lane_spring_layout
+
 # Import configuration and parser
 try:
     from config import (
         POSITION_TO_Z_LAYER,
         POSITION_TO_LANE,
-        get_lane_x_position,
+        LANE_X_POSITIONS,
         HA_PAIR_DETECTION,
         HA_PAIR_OFFSET,
         HA_PAIR_LINK_COLOR,
@@ -37,6 +45,7 @@ try:
         HA_PAIR_LINK_DASH,
         LINK_STYLES,
         SHOW_NODE_LABELS,
+        MAX_NODE_LABELS,
         NODE_LABEL_SIZE,
         SPRING_K,
         SPRING_ITERATIONS,
@@ -56,52 +65,86 @@ except ImportError as e:
     SPRING_SEED = 42
     Y_AXIS_SPREAD = 3.0
 
+# orjson parses large topology files several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _load_json(path):
+    """Read one pipeline output file (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _add_combined_edges(graph, edges):
+    """
+    Merge (source, target, attrs) links into the combined Graph
+    
+    Parallel links between two devices share one edge: 'link_types' holds
+    their types and 'weight' counts them, so the spring layout still pulls
+    those devices together once per link.
+    """
+    for u, v, attrs in edges:
+        if graph.has_edge(u, v):
+            data = graph[u][v]
+            data['link_types'].add(attrs['link_type'])
+            data['weight'] += 1
+        else:
+            graph.add_edge(u, v, link_types={attrs['link_type']}, weight=1)
+
 
 def load_topology_data():
-    """Load topology data from JSON files"""
+    """
+    Load topology data from JSON files
+    
+    Returns:
+        dict: the 'physical', 'hsrp', 'bgp' and 'combined' graphs, plus
+        'edges' holding the (source, target, attrs) list for each link type
+        so visualization need not re-bucket the combined graph's edges
+    """
+    edges = {'physical': [], 'hsrp': [], 'bgp': []}
     graphs = {
         'physical': nx.Graph(),
         'hsrp': nx.Graph(),
         'bgp': nx.DiGraph(),
-        'combined': nx.MultiGraph()
+        'combined': nx.Graph()
     }
     
     # Load physical topology
     physical_file = OUTPUT_DIR / 'cdp_topology.json'
     if physical_file.exists():
-        with open(physical_file, 'r') as f:
-            data = json.load(f)
-            for node in data['nodes']:
-                for g in graphs.values():
-                    g.add_node(node['name'], node_type=node['type'])
-            for edge in data['edges']:
-                graphs['physical'].add_edge(edge['source'], edge['target'], link_type='physical')
-                graphs['combined'].add_edge(edge['source'], edge['target'], link_type='physical')
+        data = _load_json(physical_file)
+        for node in data['nodes']:
+            for g in graphs.values():
+                g.add_node(node['name'], node_type=node['type'])
+        edges['physical'] = [(edge['source'], edge['target'], {'link_type': 'physical'})
+                             for edge in data['edges']]
+        graphs['physical'].add_edges_from(edges['physical'])
+        _add_combined_edges(graphs['combined'], edges['physical'])
     
     # Load HSRP topology
     hsrp_file = OUTPUT_DIR / 'hsrp_topology.json'
     if hsrp_file.exists():
-        with open(hsrp_file, 'r') as f:
-            data = json.load(f)
-            for edge in data['edges']:
-                graphs['hsrp'].add_edge(edge['source'], edge['target'], 
-                                       link_type='hsrp', group=edge.get('group'))
-                graphs['combined'].add_edge(edge['source'], edge['target'], 
-                                           link_type='hsrp', group=edge.get('group'))
+        data = _load_json(hsrp_file)
+        edges['hsrp'] = [(edge['source'], edge['target'], {'link_type': 'hsrp', 'group': edge.get('group')})
+                         for edge in data['edges']]
+        graphs['hsrp'].add_edges_from(edges['hsrp'])
+        _add_combined_edges(graphs['combined'], edges['hsrp'])
     
     # Load BGP topology  
     bgp_file = OUTPUT_DIR / 'bgp_topology.json'
     if bgp_file.exists():
-        with open(bgp_file, 'r') as f:
-            data = json.load(f)
-            for edge in data['edges']:
-                graphs['bgp'].add_edge(edge['source'], edge['target'], 
-                                      link_type='bgp', 
-                                      peering_type=edge.get('type'))
-                graphs['combined'].add_edge(edge['source'], edge['target'], 
-                                           link_type='bgp',
-                                           peering_type=edge.get('type'))
+        data = _load_json(bgp_file)
+        edges['bgp'] = [(edge['source'], edge['target'], {'link_type': 'bgp', 'peering_type': edge.get('type')})
+                        for edge in data['edges']]
+        graphs['bgp'].add_edges_from(edges['bgp'])
+        _add_combined_edges(graphs['combined'], edges['bgp'])
     
+    graphs['edges'] = edges
     return graphs
 
 
@@ -114,19 +157,23 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
         datacenter_filter: Optional datacenter to filter by
         
     Returns:
-        dict: {node: (x, y, z)} positions
+        (pos_3d, node_info, ha_pairs): {node: (x, y, z)} positions,
+        {node: {'z', 'lane', 'lane_x', 'parsed'}} with the parser's result
+        for each placed node, and the HA pairs found among them (both empty
+        without the enhanced parser)
     """
     pos_3d = {}
+    node_info = {}
+    ha_pairs = []
     
     if USE_ENHANCED:
         parser = EnhancedHostnameParser()
         
         # Group nodes by Z-layer and lane
-        nodes_by_layer_lane = defaultdict(lambda: defaultdict(list))
-        node_info = {}
+        nodes_by_layer_lane = defaultdict(list)  # (z_level, lane) -> nodes
         
         for node in graph.nodes():
-            parsed = parser.parse(node)
+            hostname_parsed = parsed = parser.parse(node)
             
             # If parsing failed, try to use node_type attribute from graph
             if not parsed['valid']:
@@ -135,7 +182,7 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
                 legacy_z_map = {'router': 4.0, 'core': 3.5, 'distribution': 2.5, 'access': 1.5}
                 z_level = legacy_z_map.get(node_type, 1.5)
                 lane = 0
-                lane_x = get_lane_x_position(lane)
+                lane_x = LANE_X_POSITIONS[lane]
                 parsed = {
                     'hostname': node,
                     'datacenter': None,
@@ -158,52 +205,47 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
             lane = parsed['lane']
             lane_x = parsed['lane_x']
             
-            nodes_by_layer_lane[z_level][lane].append(node)
+            nodes_by_layer_lane[(z_level, lane)].append(node)
             node_info[node] = {
                 'z': z_level,
                 'lane': lane,
                 'lane_x': lane_x,
-                'parsed': parsed
+                'parsed': hostname_parsed  # as parsed, not the legacy stand-in
             }
             
             # Debug output
-            if parsed['valid']:
+            if DEBUG and parsed['valid']:
                 pos_str = f"{parsed['position'] or 'N/A':12}"
                 method = parsed.get('parse_method', 'full')
                 print(f"  {node:20} → DC:{parsed['datacenter'] or 'N/A':5} Pos:{pos_str} "
                       f"Lane:{lane:+3d} Z:{z_level:4.1f} [{method}]")
         
-        # Position nodes using lanes and spring layout within lanes
-        for z_level in sorted(nodes_by_layer_lane.keys(), reverse=True):
-            lanes = nodes_by_layer_lane[z_level]
+        # Position nodes using lanes and spring layout within lanes: Z-layers
+        # top down, lanes in first-seen order within each (the sort is stable)
+        for (z_level, lane), nodes in sorted(nodes_by_layer_lane.items(),
+                                             key=lambda item: -item[0][0]):
+            base_x = LANE_X_POSITIONS[lane]
             
-            for lane, nodes in lanes.items():
-                if not nodes:
-                    continue
+            # For multiple nodes in same lane, spread them along Y axis
+            if len(nodes) == 1:
+                # Single node - place at lane center
+                pos_3d[nodes[0]] = (base_x, 0.0, z_level)
+            else:
+                # Multiple nodes - use spring layout for Y positioning
+                subgraph = graph.subgraph(nodes)
                 
-                base_x = get_lane_x_position(lane)
+                # Use 2D spring layout and extract Y coordinates
+                pos_2d = lane_spring_layout(
+                    subgraph,
+                    k=Y_AXIS_SPREAD,
+                    iterations=SPRING_ITERATIONS,
+                    seed=SPRING_SEED
+                )
                 
-                # For multiple nodes in same lane, spread them along Y axis
-                if len(nodes) == 1:
-                    # Single node - place at lane center
-                    pos_3d[nodes[0]] = (base_x, 0.0, z_level)
-                else:
-                    # Multiple nodes - use spring layout for Y positioning
-                    subgraph = graph.subgraph(nodes)
-                    
-                    # Use 2D spring layout and extract Y coordinates
-                    pos_2d = nx.spring_layout(
-                        subgraph,
-                        dim=2,
-                        k=Y_AXIS_SPREAD,
-                        iterations=SPRING_ITERATIONS,
-                        seed=SPRING_SEED
-                    )
-                    
-                    # Apply positions - use Y coordinate from spring layout
-                    for node in nodes:
-                        y = pos_2d[node][1] * Y_AXIS_SPREAD
-                        pos_3d[node] = (base_x, y, z_level)
+                # Apply positions - use Y coordinate from spring layout
+                for node in nodes:
+                    y = pos_2d[node][1] * Y_AXIS_SPREAD
+                    pos_3d[node] = (base_x, y, z_level)
         
         # Handle HA pairs - offset them slightly for visibility
         if HA_PAIR_DETECTION:
@@ -217,7 +259,7 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
                     pos_3d[h1] = (x1, y1 - HA_PAIR_OFFSET, z1)
                     pos_3d[h2] = (x2, y2 + HA_PAIR_OFFSET, z2)
         
-        print(f"\n✓ Positioned {len(pos_3d)} devices across {len(nodes_by_layer_lane)} Z-layers")
+        print(f"\n✓ Positioned {len(pos_3d)} devices across {len({z for z, _ in nodes_by_layer_lane})} Z-layers")
         
     else:
         # Fallback to basic layout
@@ -243,7 +285,7 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
             subgraph = graph.subgraph(nodes)
             
             if len(nodes) > 1:
-                pos_2d = nx.spring_layout(
+                pos_2d = lane_spring_layout(
                     subgraph,
                     k=SPRING_K,
                     iterations=SPRING_ITERATIONS,
@@ -256,7 +298,7 @@ def create_enhanced_3d_layout(graph, datacenter_filter=None):
                 x, y = pos_2d[node]
                 pos_3d[node] = (x, y, z)
     
-    return pos_3d
+    return pos_3d, node_info, ha_pairs
 
 
 POST_SCRIPT = r'''(function () {
@@ -469,6 +511,24 @@ POST_SCRIPT = r'''(function () {
 })();'''
 
 
+def _edge_coords(edges, node_idx, node_xyz):
+    """
+    Line-segment coordinates for (u, v, ...) edges as a (3*E, 3) array
+    
+    Endpoints are looked up as rows of node_xyz via node_idx and copied in
+    two block gathers; edges with an endpoint outside node_idx (not in this
+    view) are dropped in the same pass. Rows are [start, end, NaN-gap] per
+    edge; Plotly breaks lines at NaN the same way it did at None.
+    """
+    uv = np.fromiter((node_idx.get(node, -1) for e in edges for node in e[:2]),
+                     dtype=np.int32, count=2 * len(edges)).reshape(-1, 2)
+    uv = uv[(uv >= 0).all(axis=1)]
+    xyz = np.full((len(uv) * 3, 3), np.nan)
+    xyz[0::3] = node_xyz[uv[:, 0]]
+    xyz[1::3] = node_xyz[uv[:, 1]]
+    return xyz
+
+
 def visualize_3d_topology_enhanced(graphs, datacenter=None):
     """Create enhanced 3D interactive visualization"""
     combined_graph = graphs['combined']
@@ -485,53 +545,31 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
     
     # Create 3D layout
     print(f"\nCreating enhanced 3D layout{title_suffix}...")
-    pos_3d = create_enhanced_3d_layout(combined_graph, datacenter)
+    pos_3d, node_info, ha_pairs = create_enhanced_3d_layout(combined_graph, datacenter)
     
     if not pos_3d:
         print("❌ No devices to visualize!")
         return None
     
-    # Initialize parser for metadata
-    if USE_ENHANCED:
-        parser = EnhancedHostnameParser()
-    else:
-        parser = HostnameParser()
+    # Node coordinates as one (N, 3) array, rows in pos_3d order, shared by
+    # the edge traces and the node trace
+    node_idx = {node: i for i, node in enumerate(pos_3d)}
+    node_xyz = np.array(list(pos_3d.values()), dtype=np.float64).reshape(-1, 3)
     
-    # Separate edges by type
-    physical_edges = []
-    hsrp_edges = []
-    bgp_edges = []
-    ha_pair_edges = []
-    
-    for u, v, key, data in combined_graph.edges(data=True, keys=True):
-        link_type = data.get('link_type', 'physical')
-        if link_type == 'physical':
-            physical_edges.append((u, v, data))
-        elif link_type == 'hsrp':
-            hsrp_edges.append((u, v, data))
-        elif link_type == 'bgp':
-            bgp_edges.append((u, v, data))
-    
-    # Detect HA pairs
-    if USE_ENHANCED and HA_PAIR_DETECTION:
-        ha_pairs = parser.find_ha_pairs(list(pos_3d.keys()))
-        ha_pair_edges = [(h1, h2) for h1, h2 in ha_pairs 
-                        if h1 in pos_3d and h2 in pos_3d]
+    # Edge coordinates by type, as loaded; a datacenter view lays out only
+    # some nodes, and links leaving it are dropped while indexing
+    link_xyz = {link_type: _edge_coords(edges, node_idx, node_xyz)
+                for link_type, edges in graphs['edges'].items()}
     
     traces = []
     
-    # HA pair links (red dashed, thin)
-    if ha_pair_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v in ha_pair_edges:
-            x0, y0, z0 = pos_3d[u]
-            x1, y1, z1 = pos_3d[v]
-            edge_x += [x0, x1, None]
-            edge_y += [y0, y1, None]
-            edge_z += [z0, z1, None]
+    # HA pair links (red dashed, thin), as detected during layout
+    if ha_pairs:
+        edge_xyz = _edge_coords(ha_pairs, node_idx, node_xyz)
         
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=edge_xyz[:, 0], y=edge_xyz[:, 1], z=edge_xyz[:, 2],
             mode='lines',
             line=dict(
                 color=HA_PAIR_LINK_COLOR,
@@ -544,19 +582,13 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         ))
     
     # Physical links
-    if physical_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in physical_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+    edge_xyz = link_xyz['physical']
+    if len(edge_xyz):
         
         style = LINK_STYLES.get('physical', {})
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=edge_xyz[:, 0], y=edge_xyz[:, 1], z=edge_xyz[:, 2],
             mode='lines',
             line=dict(
                 color=style.get('color', '#CCCCCC'),
@@ -569,19 +601,13 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         ))
     
     # HSRP links
-    if hsrp_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in hsrp_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+    edge_xyz = link_xyz['hsrp']
+    if len(edge_xyz):
         
         style = LINK_STYLES.get('hsrp', {})
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=edge_xyz[:, 0], y=edge_xyz[:, 1], z=edge_xyz[:, 2],
             mode='lines',
             line=dict(
                 color=style.get('color', '#FF6B6B'),
@@ -594,19 +620,13 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         ))
     
     # BGP links
-    if bgp_edges:
-        edge_x, edge_y, edge_z = [], [], []
-        for u, v, data in bgp_edges:
-            if u in pos_3d and v in pos_3d:
-                x0, y0, z0 = pos_3d[u]
-                x1, y1, z1 = pos_3d[v]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
+    edge_xyz = link_xyz['bgp']
+    if len(edge_xyz):
         
         style = LINK_STYLES.get('bgp', {})
-        traces.append(go.Scatter3d(
-            x=edge_x, y=edge_y, z=edge_z,
+        traces.append(dict(
+            type='scatter3d',
+            x=edge_xyz[:, 0], y=edge_xyz[:, 1], z=edge_xyz[:, 2],
             mode='lines',
             line=dict(
                 color=style.get('color', '#4ECDC4'),
@@ -619,7 +639,6 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         ))
     
     # Create nodes with icons and colors
-    node_x, node_y, node_z = [], [], []
     node_layer_keys = []  # per-node layer label for JS toggles
     node_text = []
     node_symbols = []
@@ -627,15 +646,14 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
     node_colors = []
     hover_texts = []
     
-    for node in pos_3d.keys():
-        x, y, z = pos_3d[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_z.append(z)
+    # Labels only for graphs small enough to render them smoothly
+    show_labels = SHOW_NODE_LABELS and len(pos_3d) <= MAX_NODE_LABELS
+    
+    for node, z in zip(pos_3d, node_xyz[:, 2].tolist()):
         
         # Track which Z-layer this node belongs to (used by JS layer toggles)
         if USE_ENHANCED:
-            parsed = parser.parse(node)
+            parsed = node_info[node]['parsed']
             layer_label = get_position_display_name(parsed['position']) if parsed.get('position') else f"Z {z:.1f}"
             node_layer_keys.append(layer_label)
         else:
@@ -645,7 +663,7 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
             # 'parsed' was already computed above for layer tracking
             icon_config = parsed['icon_config']
             
-            node_text.append(node if SHOW_NODE_LABELS else '')
+            node_text.append(node if show_labels else '')
             node_symbols.append(icon_config.get('symbol', 'circle'))
             node_sizes.append(icon_config.get('size', 10))
             node_colors.append(icon_config.get('color', '#AAAAAA'))
@@ -663,16 +681,17 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
             
             hover_texts.append('<br>'.join(hover_parts))
         else:
-            node_text.append(node if SHOW_NODE_LABELS else '')
+            node_text.append(node if show_labels else '')
             node_symbols.append('circle')
             node_sizes.append(10)
             node_colors.append('#4ECDC4')
             hover_texts.append(node)
     
     # Node trace
-    traces.append(go.Scatter3d(
-        x=node_x, y=node_y, z=node_z,
-        mode='markers+text' if SHOW_NODE_LABELS else 'markers',
+    traces.append(dict(
+        type='scatter3d',
+        x=node_xyz[:, 0], y=node_xyz[:, 1], z=node_xyz[:, 2],
+        mode='markers+text' if show_labels else 'markers',
         text=node_text,
         textposition='top center',
         textfont=dict(size=NODE_LABEL_SIZE, color='black'),
@@ -689,9 +708,6 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         showlegend=True
     ))
     
-    # Create figure
-    fig = go.Figure(data=traces)
-    
     # Get Z-layer labels
     if USE_ENHANCED:
         z_levels = sorted(set(POSITION_TO_Z_LAYER.values()), reverse=True)
@@ -706,7 +722,7 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
         z_levels = [3, 2, 1, 0]
         z_labels = ['Edge', 'Core', 'Distribution', 'Access']
     
-    fig.update_layout(
+    layout = dict(
         title=dict(
             text=f'3D Network Topology - Enhanced Lane-Based Layout{title_suffix}<br>'
                  f'<sub>Drag to rotate | Scroll to zoom | Z-layers with lanes</sub>',
@@ -728,7 +744,7 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
                 zerolinecolor='#888',
                 zerolinewidth=2,
                 showticklabels=True,
-                title='',
+                title=dict(text=''),
                 tickmode='linear',
                 tick0=-20,
                 dtick=5,
@@ -741,7 +757,7 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
                 zeroline=False,
                 zerolinecolor='#888',
                 showticklabels=False,
-                title='',
+                title=dict(text=''),
                 showbackground=False,
                 showspikes=False
             ),
@@ -750,7 +766,7 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
                 gridcolor='#E0E0E0',
                 zeroline=False,
                 showticklabels=False,
-                title='',
+                title=dict(text=''),
                 ticktext=z_labels,
                 tickvals=z_levels,
                 showbackground=False,
@@ -771,10 +787,15 @@ def visualize_3d_topology_enhanced(graphs, datacenter=None):
     else:
         output_file = OUTPUT_DIR / 'topology_3d_enhanced.html'
     
-    fig.write_html(
+    # Traces and layout are plain dicts, so plotly's per-property validation
+    # is skipped; fill in the default template as go.Figure would
+    layout['template'] = pio.templates[pio.templates.default].to_plotly_json()
+    pio.write_html(
+        dict(data=traces, layout=layout),
         output_file,
         include_plotlyjs='cdn',
         full_html=True,
+        validate=False,
         post_script=POST_SCRIPT
     )
     print(f"\n✓ Enhanced 3D visualization saved to {output_file}")
@@ -799,7 +820,7 @@ def main():
         return
     
     print(f"  ✓ Loaded {len(graphs['combined'].nodes())} devices")
-    print(f"  ✓ Loaded {len(graphs['combined'].edges())} connections\n")
+    print(f"  ✓ Loaded {sum(map(len, graphs['edges'].values()))} connections\n")
     
     # Generate visualizations
     if USE_ENHANCED:
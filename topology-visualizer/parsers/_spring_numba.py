@@ -0,0 +1,363 @@
+"""
+Numba-compiled Fruchterman-Reingold layout for the enhanced 3D generators
+
+spring2d runs the same update rule, cooling schedule and stopping test as
+nx.spring_layout's dense solver, but as plain loops compiled to native code;
+spring2d_bh swaps its O(N^2) repulsion for a Barnes-Hut quadtree walk.
+lane_spring_layout picks between them when numba is installed and falls back
+to nx.spring_layout otherwise. With USE_LBFGS_LAYOUT set (and scipy
+installed) it instead minimizes the FR energy directly with L-BFGS.
+"""
+
+import math
+import sys
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+
+# Add parent directory to path to import config
+SCRIPT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+try:
+    from config import (
+        BARNES_HUT_THRESHOLD,
+        BARNES_HUT_THETA,
+        USE_LBFGS_LAYOUT,
+        LBFGS_MAX_ITER
+    )
+except ImportError:
+    BARNES_HUT_THRESHOLD = 30
+    BARNES_HUT_THETA = 0.9
+    USE_LBFGS_LAYOUT = False
+    LBFGS_MAX_ITER = 50
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# L-BFGS energy layout (USE_LBFGS_LAYOUT); skipped when scipy is not installed
+try:
+    from scipy.optimize import minimize
+except ImportError:
+    minimize = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def spring2d(pos, edges_u, edges_v, edges_w, k, iters):
+        """
+        Fruchterman-Reingold iterations on (n, 2) positions, in place
+        
+        Repulsion k^2/d between every pair, attraction w*d^2/k along each
+        edge of weight w (parallel edges each add their own), temperature
+        cooled linearly from 0.1 of the initial extent.
+        """
+        n = pos.shape[0]
+        t = max(pos[:, 0].max() - pos[:, 0].min(), pos[:, 1].max() - pos[:, 1].min()) * 0.1
+        dt = t / (iters + 1)
+        disp = np.empty((n, 2))
+        
+        for _ in range(iters):
+            disp[:] = 0.0
+            for i in range(n):
+                for j in range(n):
+                    dx = pos[i, 0] - pos[j, 0]
+                    dy = pos[i, 1] - pos[j, 1]
+                    d = max(math.sqrt(dx * dx + dy * dy), 0.01)
+                    c = k * k / (d * d)
+                    disp[i, 0] += dx * c
+                    disp[i, 1] += dy * c
+            
+            for e in range(edges_u.shape[0]):
+                u = edges_u[e]
+                v = edges_v[e]
+                dx = pos[u, 0] - pos[v, 0]
+                dy = pos[u, 1] - pos[v, 1]
+                c = edges_w[e] * max(math.sqrt(dx * dx + dy * dy), 0.01) / k
+                disp[u, 0] -= dx * c
+                disp[u, 1] -= dy * c
+                disp[v, 0] += dx * c
+                disp[v, 1] += dy * c
+            
+            moved = 0.0
+            for i in range(n):
+                length = max(math.sqrt(disp[i, 0] ** 2 + disp[i, 1] ** 2), 0.01)
+                sx = disp[i, 0] * t / length
+                sy = disp[i, 1] * t / length
+                pos[i, 0] += sx
+                pos[i, 1] += sy
+                moved += sx * sx + sy * sy
+            t -= dt
+            if math.sqrt(moved) / n < 1e-4:
+                break
+        
+        return pos
+    
+    @njit(cache=True)
+    def _quadtree(pos, cap):
+        """
+        Quadtree over (n, 2) positions, built without recursion
+        
+        Returns per-cell arrays (center x, center y, half width, mass, mass
+        sum x, mass sum y, is-internal flag, leaf body index, 4 child slots).
+        Cells that would split below 1e-9 of the root, or once cap cells are
+        in use, keep several bodies as one lumped leaf.
+        """
+        n = pos.shape[0]
+        cx = np.empty(cap)
+        cy = np.empty(cap)
+        half = np.empty(cap)
+        mass = np.zeros(cap)
+        sx = np.zeros(cap)
+        sy = np.zeros(cap)
+        internal = np.zeros(cap, dtype=np.bool_)
+        body = np.full(cap, -1, dtype=np.int64)
+        child = np.full((cap, 4), -1, dtype=np.int64)
+        
+        x0 = pos[:, 0].min()
+        x1 = pos[:, 0].max()
+        y0 = pos[:, 1].min()
+        y1 = pos[:, 1].max()
+        cx[0] = (x0 + x1) / 2
+        cy[0] = (y0 + y1) / 2
+        half[0] = max(x1 - x0, y1 - y0) / 2 + 1e-9
+        min_half = half[0] * 1e-9
+        count = 1
+        
+        for b in range(n):
+            px = pos[b, 0]
+            py = pos[b, 1]
+            node = 0
+            while True:
+                if internal[node]:
+                    mass[node] += 1.0
+                    sx[node] += px
+                    sy[node] += py
+                    q = (1 if px >= cx[node] else 0) + (2 if py >= cy[node] else 0)
+                    c = child[node, q]
+                    if c == -1:
+                        if count == cap:
+                            break
+                        c = count
+                        count += 1
+                        h = half[node] / 2
+                        cx[c] = cx[node] + (h if q & 1 else -h)
+                        cy[c] = cy[node] + (h if q & 2 else -h)
+                        half[c] = h
+                        body[c] = b
+                        mass[c] = 1.0
+                        sx[c] = px
+                        sy[c] = py
+                        child[node, q] = c
+                        break
+                    node = c
+                elif mass[node] == 0.0:
+                    body[node] = b
+                    mass[node] = 1.0
+                    sx[node] = px
+                    sy[node] = py
+                    break
+                elif half[node] < min_half or count == cap:
+                    mass[node] += 1.0
+                    sx[node] += px
+                    sy[node] += py
+                    break
+                else:
+                    # Split the leaf: move its contents down one level, then
+                    # insert b into the now-internal cell on the next pass
+                    lx = sx[node] / mass[node]
+                    ly = sy[node] / mass[node]
+                    q = (1 if lx >= cx[node] else 0) + (2 if ly >= cy[node] else 0)
+                    c = count
+                    count += 1
+                    h = half[node] / 2
+                    cx[c] = cx[node] + (h if q & 1 else -h)
+                    cy[c] = cy[node] + (h if q & 2 else -h)
+                    half[c] = h
+                    body[c] = body[node]
+                    mass[c] = mass[node]
+                    sx[c] = sx[node]
+                    sy[c] = sy[node]
+                    child[node, q] = c
+                    body[node] = -1
+                    internal[node] = True
+        
+        return half, mass, sx, sy, internal, body, child
+    
+    @njit(cache=True)
+    def spring2d_bh(pos, edges_u, edges_v, edges_w, k, iters, theta):
+        """
+        spring2d with Barnes-Hut repulsion
+        
+        Each iteration rebuilds a quadtree; a cell of width w at distance d
+        from a node repels it as one body at its center of mass when
+        w/d < theta, making repulsion O(N log N) per iteration.
+        """
+        n = pos.shape[0]
+        t = max(pos[:, 0].max() - pos[:, 0].min(), pos[:, 1].max() - pos[:, 1].min()) * 0.1
+        dt = t / (iters + 1)
+        disp = np.empty((n, 2))
+        cap = 8 * n + 64
+        stack = np.empty(cap, dtype=np.int64)
+        
+        for _ in range(iters):
+            half, mass, sx, sy, internal, body, child = _quadtree(pos, cap)
+            
+            for i in range(n):
+                px = pos[i, 0]
+                py = pos[i, 1]
+                fx = 0.0
+                fy = 0.0
+                stack[0] = 0
+                top = 1
+                while top > 0:
+                    top -= 1
+                    node = stack[top]
+                    m = mass[node]
+                    mx = sx[node]
+                    my = sy[node]
+                    if not internal[node] and body[node] == i:
+                        # Leaf holding i (possibly lumped with others)
+                        m -= 1.0
+                        if m == 0.0:
+                            continue
+                        mx -= px
+                        my -= py
+                    dx = px - mx / m
+                    dy = py - my / m
+                    d = math.sqrt(dx * dx + dy * dy)
+                    if internal[node] and 2.0 * half[node] >= theta * d:
+                        for q in range(4):
+                            c = child[node, q]
+                            if c != -1:
+                                stack[top] = c
+                                top += 1
+                        continue
+                    d = max(d, 0.01)
+                    c = m * k * k / (d * d)
+                    fx += dx * c
+                    fy += dy * c
+                disp[i, 0] = fx
+                disp[i, 1] = fy
+            
+            for e in range(edges_u.shape[0]):
+                u = edges_u[e]
+                v = edges_v[e]
+                dx = pos[u, 0] - pos[v, 0]
+                dy = pos[u, 1] - pos[v, 1]
+                c = edges_w[e] * max(math.sqrt(dx * dx + dy * dy), 0.01) / k
+                disp[u, 0] -= dx * c
+                disp[u, 1] -= dy * c
+                disp[v, 0] += dx * c
+                disp[v, 1] += dy * c
+            
+            moved = 0.0
+            for i in range(n):
+                length = max(math.sqrt(disp[i, 0] ** 2 + disp[i, 1] ** 2), 0.01)
+                sx_i = disp[i, 0] * t / length
+                sy_i = disp[i, 1] * t / length
+                pos[i, 0] += sx_i
+                pos[i, 1] += sy_i
+                moved += sx_i * sx_i + sy_i * sy_i
+            t -= dt
+            if math.sqrt(moved) / n < 1e-4:
+                break
+        
+        return pos
+else:
+    spring2d = None
+    spring2d_bh = None
+
+
+def fr_energy(flat, ij, k, gravity=1.0, weights=None):
+    """
+    Fruchterman-Reingold energy and its gradient for flattened 2D positions
+    
+    Attraction w*d^3/(3k) per edge and repulsion -k^2 log(d) per node pair
+    have the FR forces d^2/k and k^2/d as their derivatives. A gravity term
+    (distance from the centroid) keeps disconnected nodes from drifting off.
+    
+    Args:
+        flat: (2n,) positions
+        ij: (m, 2) array of edge endpoint indices
+        k: Optimal distance between nodes
+        gravity: Weight of the centroid pull
+        weights: Optional (m,) edge weights (default 1 each)
+    
+    Returns:
+        (energy, gradient) with the gradient shaped like flat
+    """
+    pos = flat.reshape(-1, 2)
+    n = len(pos)
+    
+    delta = pos[:, None, :] - pos[None, :, :]
+    dist = np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+    np.fill_diagonal(dist, 1.0)
+    np.clip(dist, 0.01, None, out=dist)
+    energy = -k * k * np.log(dist[np.triu_indices(n, 1)]).sum()
+    grad = -k * k * np.einsum('ijk,ij->ik', delta, 1.0 / (dist * dist))
+    
+    d_edge = pos[ij[:, 0]] - pos[ij[:, 1]]
+    length = np.clip(np.linalg.norm(d_edge, axis=1), 0.01, None)
+    if weights is None:
+        weights = np.ones(len(ij))
+    energy += (weights * length ** 3).sum() / (3 * k)
+    pull = d_edge * (weights * length / k)[:, None]
+    np.add.at(grad, ij[:, 0], pull)
+    np.subtract.at(grad, ij[:, 1], pull)
+    
+    offset = pos - pos.mean(axis=0)
+    radius = np.clip(np.linalg.norm(offset, axis=1), 1e-9, None)
+    energy += gravity * radius.sum()
+    unit = offset / radius[:, None]
+    grad += gravity * (unit - unit.mean(axis=0))
+    
+    return energy, grad.ravel()
+
+
+def lane_spring_layout(graph, k, iterations, seed):
+    """
+    2D spring layout of a (small) graph, scaled like nx.spring_layout
+    
+    Args:
+        graph: NetworkX graph or MultiGraph; an edge 'weight' (default 1)
+            scales its attraction, as in nx.spring_layout
+        k: Optimal distance between nodes
+        iterations: Maximum number of iterations
+        seed: Seed for the random initial positions
+    
+    Returns:
+        dict: {node: (x, y)} centered on the origin, within [-1, 1]
+    """
+    use_lbfgs = USE_LBFGS_LAYOUT and minimize is not None
+    if (spring2d is None and not use_lbfgs) or len(graph) < 2:
+        return nx.spring_layout(graph, dim=2, k=k, iterations=iterations, seed=seed)
+    
+    nodes = list(graph)
+    node_idx = {node: i for i, node in enumerate(nodes)}
+    n_edges = graph.number_of_edges()
+    edges_u = np.fromiter((node_idx[u] for u, v in graph.edges()), dtype=np.int64, count=n_edges)
+    edges_v = np.fromiter((node_idx[v] for u, v in graph.edges()), dtype=np.int64, count=n_edges)
+    edges_w = np.fromiter((w for u, v, w in graph.edges(data='weight', default=1)),
+                          dtype=np.float64, count=n_edges)
+    
+    # Same initial positions nx.spring_layout draws for this seed
+    pos = np.random.RandomState(seed).rand(len(nodes), 2)
+    if use_lbfgs:
+        ij = np.stack([edges_u, edges_v], axis=1)
+        result = minimize(fr_energy, pos.ravel(), args=(ij, float(k), 1.0, edges_w), jac=True,
+                          method='L-BFGS-B', options={'maxiter': LBFGS_MAX_ITER})
+        pos = result.x.reshape(-1, 2)
+    elif len(nodes) > BARNES_HUT_THRESHOLD:
+        spring2d_bh(pos, edges_u, edges_v, edges_w, float(k), iterations, BARNES_HUT_THETA)
+    else:
+        spring2d(pos, edges_u, edges_v, edges_w, float(k), iterations)
+    
+    pos -= pos.mean(axis=0)
+    lim = np.abs(pos).max()
+    if lim > 0:
+        pos /= lim
+    return dict(zip(nodes, pos.tolist()))
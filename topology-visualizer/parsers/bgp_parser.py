@@ -3,12 +3,33 @@
 BGP Parser - Extract BGP peering relationships from configs
 """
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
 from typing import Dict, List
 import json
 from ciscoconfparse import CiscoConfParse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Pre-compiled patterns used while parsing
+_RE_IP = re.compile(r'ip address\s+(\S+)\s+')
+_RE_BGP_AS = re.compile(r'router bgp\s+(\d+)')
+# One neighbor line of the router bgp block: address, then remote-as,
+# description, or any other attribute (which only registers the neighbor)
+_RE_NEIGHBOR_LINE = re.compile(
+    r'^[ \t]+neighbor[ \t]+(\S+)[ \t]+(?:remote-as[ \t]+(\d+)|description[ \t]+(.+)|\S)',
+    re.M
+)
+
+# Below this many config files, pool start-up costs more than it saves
+PARALLEL_PARSE_MIN_FILES = 8
+
 
 class BGPParser:
     """Parse BGP configuration to identify peering relationships"""
@@ -18,10 +39,22 @@ class BGPParser:
         self.peers = []
         self.edges = []
         
+    def _parse_one(self, config_file: Path):
+        """Build one parse tree and extract (loopback IP, BGP neighbors)"""
+        parse = CiscoConfParse(str(config_file))
+        return (self._extract_loopback(parse),
+                self._extract_bgp(parse, config_file.stem))
+    
     def parse_loopback(self, config_file: Path) -> str:
         """Extract loopback0 IP from config"""
-        parse = CiscoConfParse(str(config_file))
-        
+        return self._extract_loopback(CiscoConfParse(str(config_file)))
+    
+    def parse_config(self, config_file: Path) -> List[Dict]:
+        """Parse BGP configuration from a single device"""
+        return self._extract_bgp(CiscoConfParse(str(config_file)), config_file.stem)
+    
+    def _extract_loopback(self, parse: CiscoConfParse) -> str:
+        """Extract loopback0 IP from a parsed config"""
         # Find Loopback0 interface
         loopback_objs = parse.find_objects(r'^interface Loopback0')
         if not loopback_objs:
@@ -29,17 +62,14 @@ class BGPParser:
         
         # Find IP address under loopback
         for child in loopback_objs[0].children:
-            ip_match = re.search(r'ip address\s+(\S+)\s+', child.text)
+            ip_match = _RE_IP.search(child.text)
             if ip_match:
                 return ip_match.group(1)
         
         return None
     
-    def parse_config(self, config_file: Path) -> List[Dict]:
-        """Parse BGP configuration from a single device"""
-        parse = CiscoConfParse(str(config_file))
-        device_name = config_file.stem
-        
+    def _extract_bgp(self, parse: CiscoConfParse, device_name: str) -> List[Dict]:
+        """Extract BGP neighbors from a parsed config"""
         bgp_configs = []
         
         # Find BGP AS number
@@ -49,23 +79,18 @@ class BGPParser:
         
         # Should only be one router bgp statement
         bgp_obj = bgp_objs[0]
-        as_match = re.search(r'router bgp\s+(\d+)', bgp_obj.text)
+        as_match = _RE_BGP_AS.search(bgp_obj.text)
         if not as_match:
             return []
         
         local_as = as_match.group(1)
         
-        # Find all BGP neighbors
-        neighbor_objs = bgp_obj.re_search_children(r'^\s+neighbor\s+(\S+)')
+        # Scan all neighbor lines of the BGP block in one pass
+        bgp_text = '\n'.join(child.text for child in bgp_obj.children)
         
         neighbors = {}
-        for neighbor_line in neighbor_objs:
-            neighbor_match = re.search(r'neighbor\s+(\S+)\s+(.+)', neighbor_line.text)
-            if not neighbor_match:
-                continue
-            
-            neighbor_ip = neighbor_match.group(1)
-            config_line = neighbor_match.group(2)
+        for neighbor_match in _RE_NEIGHBOR_LINE.finditer(bgp_text):
+            neighbor_ip, remote_as, description = neighbor_match.groups()
             
             if neighbor_ip not in neighbors:
                 neighbors[neighbor_ip] = {
@@ -76,17 +101,11 @@ class BGPParser:
                     'description': None
                 }
             
-            # Extract remote AS
-            if 'remote-as' in config_line:
-                remote_as_match = re.search(r'remote-as\s+(\d+)', config_line)
-                if remote_as_match:
-                    neighbors[neighbor_ip]['remote_as'] = remote_as_match.group(1)
-            
-            # Extract description
-            if 'description' in config_line:
-                desc_match = re.search(r'description\s+(.+)', config_line)
-                if desc_match:
-                    neighbors[neighbor_ip]['description'] = desc_match.group(1).strip()
+            # Record remote AS or description
+            if remote_as:
+                neighbors[neighbor_ip]['remote_as'] = remote_as
+            elif description:
+                neighbors[neighbor_ip]['description'] = description.strip()
         
         bgp_configs = list(neighbors.values())
         return bgp_configs
@@ -95,27 +114,29 @@ class BGPParser:
         """Parse all config files and build BGP peering relationships"""
         config_files = list(self.config_dir.glob('*.cfg'))
         
-        # Build IP to device name mapping from loopback IPs
-        ip_to_device = {}
-        for config_file in config_files:
-            device_name = config_file.stem
-            loopback_ip = self.parse_loopback(config_file)
-            if loopback_ip:
-                ip_to_device[loopback_ip] = device_name
+        # Parse each config once (in worker processes for larger
+        # directories); build IP to device name mapping from loopback IPs
+        # alongside the BGP neighbor list
+        workers = min(len(config_files), os.cpu_count() or 1)
+        if workers > 1 and len(config_files) >= PARALLEL_PARSE_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_one_worker, config_files, chunksize=4))
+        else:
+            results = [_parse_one_worker(config_file) for config_file in config_files]
         
-        all_bgp = []
-        for config_file in config_files:
-            bgp_configs = self.parse_config(config_file)
-            all_bgp.extend(bgp_configs)
+        ip_to_device = {loopback_ip: device_name
+                        for device_name, loopback_ip, _ in results if loopback_ip}
+        all_bgp = list(chain.from_iterable(bgp_configs for _, _, bgp_configs in results))
         
         self.peers = all_bgp
         
         # Build edges showing BGP peerings with proper device name resolution
         edges = []
         processed = set()
+        processed_add = processed.add
         
         for peer in all_bgp:
-            peer_key = f"{peer['device']}_{peer['neighbor_ip']}"
+            peer_key = (peer['device'], peer['neighbor_ip'])
             
             if peer_key in processed:
                 continue
@@ -134,7 +155,7 @@ class BGPParser:
             }
             
             edges.append(edge)
-            processed.add(peer_key)
+            processed_add(peer_key)
         
         self.edges = edges
         
@@ -147,8 +168,12 @@ class BGPParser:
         """Export BGP topology to JSON"""
         bgp_data = self.parse_all()
         
-        with open(output_file, 'w') as f:
-            json.dump(bgp_data, f, indent=2)
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(bgp_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(bgp_data, f, indent=2)
         
         print(f"✓ Exported BGP topology to {output_file}")
         print(f"   BGP Peers: {len(bgp_data['peers'])}")
@@ -163,6 +188,12 @@ class BGPParser:
         return bgp_data
 
 
+def _parse_one_worker(config_file: Path):
+    """Process-pool entry point: (device name, loopback IP, BGP neighbors)"""
+    loopback_ip, bgp_configs = BGPParser(config_file.parent)._parse_one(config_file)
+    return config_file.stem, loopback_ip, bgp_configs
+
+
 if __name__ == '__main__':
     parser = BGPParser('/app/configs')
     bgp_data = parser.export_json('/app/output/bgp_topology.json')
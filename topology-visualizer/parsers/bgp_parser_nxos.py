@@ -4,12 +4,32 @@ BGP Parser for Cisco NX-OS - Extract BGP peering relationships
 Handles NX-OS template-based configuration syntax
 """
 
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
 from typing import Dict, List
 import json
 from ciscoconfparse import CiscoConfParse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Pre-compiled patterns used while parsing
+_RE_IP = re.compile(r'ip address\s+(\S+)')
+_RE_BGP_AS = re.compile(r'router bgp\s+(\d+)')
+_RE_TEMPLATE = re.compile(r'template peer\s+(\S+)')
+_RE_NEIGHBOR = re.compile(r'neighbor\s+(\S+)')
+_RE_INHERIT = re.compile(r'inherit peer\s+(\S+)')
+_RE_REMOTE_AS = re.compile(r'remote-as\s+(\d+)')
+_RE_DESC = re.compile(r'description\s+(.+)')
+
+# Below this many config files, pool start-up costs more than it saves
+PARALLEL_PARSE_MIN_FILES = 8
+
 
 class BGPParserNXOS:
     """Parse NX-OS BGP configuration to identify peering relationships"""
@@ -19,10 +39,22 @@ class BGPParserNXOS:
         self.peers = []
         self.edges = []
         
+    def _parse_one(self, config_file: Path):
+        """Build one parse tree and extract (loopback IP, BGP neighbors)"""
+        parse = CiscoConfParse(str(config_file), syntax='nxos')
+        return (self._extract_loopback(parse),
+                self._extract_bgp(parse, config_file.stem))
+    
     def parse_loopback(self, config_file: Path) -> str:
         """Extract loopback0 IP from NX-OS config"""
-        parse = CiscoConfParse(str(config_file), syntax='nxos')
-        
+        return self._extract_loopback(CiscoConfParse(str(config_file), syntax='nxos'))
+    
+    def parse_config(self, config_file: Path) -> List[Dict]:
+        """Parse NX-OS BGP configuration from a single device"""
+        return self._extract_bgp(CiscoConfParse(str(config_file), syntax='nxos'), config_file.stem)
+    
+    def _extract_loopback(self, parse: CiscoConfParse) -> str:
+        """Extract loopback0 IP from a parsed config"""
         # Find Loopback0 interface
         loopback_objs = parse.find_objects(r'^interface loopback0')
         if not loopback_objs:
@@ -30,17 +62,14 @@ class BGPParserNXOS:
         
         # Find IP address under loopback
         for child in loopback_objs[0].children:
-            ip_match = re.search(r'ip address\s+(\S+)', child.text)
+            ip_match = _RE_IP.search(child.text)
             if ip_match:
                 return ip_match.group(1).split('/')[0]  # Strip /32 if present
         
         return None
     
-    def parse_config(self, config_file: Path) -> List[Dict]:
-        """Parse NX-OS BGP configuration from a single device"""
-        parse = CiscoConfParse(str(config_file), syntax='nxos')
-        device_name = config_file.stem
-        
+    def _extract_bgp(self, parse: CiscoConfParse, device_name: str) -> List[Dict]:
+        """Extract NX-OS BGP neighbors from a parsed config"""
         bgp_configs = []
         
         # Find BGP AS number
@@ -49,7 +78,7 @@ class BGPParserNXOS:
             return []
         
         bgp_obj = bgp_objs[0]
-        as_match = re.search(r'router bgp\s+(\d+)', bgp_obj.text)
+        as_match = _RE_BGP_AS.search(bgp_obj.text)
         if not as_match:
             return []
         
@@ -60,7 +89,7 @@ class BGPParserNXOS:
         template_objs = parse.find_objects(r'^\s+template peer')
         
         for template_obj in template_objs:
-            template_match = re.search(r'template peer\s+(\S+)', template_obj.text)
+            template_match = _RE_TEMPLATE.search(template_obj.text)
             if not template_match:
                 continue
             
@@ -69,11 +98,11 @@ class BGPParserNXOS:
             
             # Get remote-as from template
             for child in template_obj.children:
-                remote_as_match = re.search(r'remote-as\s+(\d+)', child.text)
+                remote_as_match = _RE_REMOTE_AS.search(child.text)
                 if remote_as_match:
                     template_data['remote_as'] = remote_as_match.group(1)
                 
-                desc_match = re.search(r'description\s+(.+)', child.text)
+                desc_match = _RE_DESC.search(child.text)
                 if desc_match:
                     template_data['description'] = desc_match.group(1).strip()
             
@@ -83,7 +112,7 @@ class BGPParserNXOS:
         neighbor_objs = parse.find_objects(r'^\s+neighbor\s+\d+\.')
         
         for neighbor_obj in neighbor_objs:
-            neighbor_match = re.search(r'neighbor\s+(\S+)', neighbor_obj.text)
+            neighbor_match = _RE_NEIGHBOR.search(neighbor_obj.text)
             if not neighbor_match:
                 continue
             
@@ -101,7 +130,7 @@ class BGPParserNXOS:
             # Check neighbor's child config lines
             for child in neighbor_obj.children:
                 # Check for template inheritance
-                inherit_match = re.search(r'inherit peer\s+(\S+)', child.text)
+                inherit_match = _RE_INHERIT.search(child.text)
                 if inherit_match:
                     template_name = inherit_match.group(1)
                     neighbor_data['template'] = template_name
@@ -114,12 +143,12 @@ class BGPParserNXOS:
                             neighbor_data['description'] = templates[template_name]['description']
                 
                 # Direct remote-as (overrides template)
-                remote_as_match = re.search(r'remote-as\s+(\d+)', child.text)
+                remote_as_match = _RE_REMOTE_AS.search(child.text)
                 if remote_as_match:
                     neighbor_data['remote_as'] = remote_as_match.group(1)
                 
                 # Description
-                desc_match = re.search(r'description\s+(.+)', child.text)
+                desc_match = _RE_DESC.search(child.text)
                 if desc_match:
                     neighbor_data['description'] = desc_match.group(1).strip()
             
@@ -136,27 +165,29 @@ class BGPParserNXOS:
             print(f"Warning: No .cfg or .txt files found in {self.config_dir}")
             return {'peers': [], 'edges': []}
         
-        # Build IP to device name mapping from loopback IPs
-        ip_to_device = {}
-        for config_file in config_files:
-            device_name = config_file.stem
-            loopback_ip = self.parse_loopback(config_file)
-            if loopback_ip:
-                ip_to_device[loopback_ip] = device_name
+        # Parse each config once (in worker processes for larger
+        # directories); build IP to device name mapping from loopback IPs
+        # alongside the BGP neighbor list
+        workers = min(len(config_files), os.cpu_count() or 1)
+        if workers > 1 and len(config_files) >= PARALLEL_PARSE_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_one_worker, config_files, chunksize=4))
+        else:
+            results = [_parse_one_worker(config_file) for config_file in config_files]
         
-        all_bgp = []
-        for config_file in config_files:
-            bgp_configs = self.parse_config(config_file)
-            all_bgp.extend(bgp_configs)
+        ip_to_device = {loopback_ip: device_name
+                        for device_name, loopback_ip, _ in results if loopback_ip}
+        all_bgp = list(chain.from_iterable(bgp_configs for _, _, bgp_configs in results))
         
         self.peers = all_bgp
         
         # Build edges showing BGP peerings with proper device name resolution
         edges = []
         processed = set()
+        processed_add = processed.add
         
         for peer in all_bgp:
-            peer_key = f"{peer['device']}_{peer['neighbor_ip']}"
+            peer_key = (peer['device'], peer['neighbor_ip'])
             
             if peer_key in processed:
                 continue
@@ -176,7 +207,7 @@ class BGPParserNXOS:
             }
             
             edges.append(edge)
-            processed.add(peer_key)
+            processed_add(peer_key)
         
         self.edges = edges
         
@@ -189,8 +220,12 @@ class BGPParserNXOS:
         """Export BGP topology to JSON"""
         bgp_data = self.parse_all()
         
-        with open(output_file, 'w') as f:
-            json.dump(bgp_data, f, indent=2)
+        if orjson is not None:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(bgp_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(bgp_data, f, indent=2)
         
         print(f"✓ Exported NX-OS BGP topology to {output_file}")
         print(f"   BGP Peers: {len(bgp_data['peers'])}")
@@ -205,6 +240,12 @@ class BGPParserNXOS:
         return bgp_data
 
 
+def _parse_one_worker(config_file: Path):
+    """Process-pool entry point: (device name, loopback IP, BGP neighbors)"""
+    loopback_ip, bgp_configs = BGPParserNXOS(config_file.parent)._parse_one(config_file)
+    return config_file.stem, loopback_ip, bgp_configs
+
+
 if __name__ == '__main__':
     import sys
     config_dir = sys.argv[1] if len(sys.argv) > 1 else 'data/running_configs'
@@ -8,6 +8,7 @@ Examples:
 """
 
 import re
+from functools import lru_cache
 from typing import Dict, Optional
 import sys
 from pathlib import Path
@@ -22,9 +23,10 @@ try:
         POSITION_TO_Z_LAYER,
         POSITION_TO_LANE,
         TYPE_TO_ICON,
+        HA_PAIR_BUCKETING,
         get_z_layer,
         get_lane,
-        get_lane_x_position,
+        LANE_X_POSITIONS,
         get_icon_config
     )
 except ImportError:
@@ -33,9 +35,10 @@ except ImportError:
     POSITION_TO_Z_LAYER = {'co': 3.5, 'acc': 1.5}
     POSITION_TO_LANE = {'co': 0, 'acc': 0}
     TYPE_TO_ICON = {}
+    HA_PAIR_BUCKETING = True
     get_z_layer = lambda p: 1.5
     get_lane = lambda p: 0
-    get_lane_x_position = lambda l: l * 2.0
+    LANE_X_POSITIONS = {l: l * 2.0 for l in range(-10, 11)}
     get_icon_config = lambda t: {}
 
 
@@ -53,17 +56,19 @@ class EnhancedHostnameParser:
         pos_pattern = '|'.join(self.positions)
         type_pattern = '|'.join(self.types) if self.types else r'[a-z]{2}'
         
-        # Pattern: datacenter(2-4) + position(2-3) + type(2) + counter(2)
+        # Pattern: datacenter(2-4) + position(2-3) + type(2) + counter(2),
+        # or TYPE+COUNT for flexibility (e.g., sr01, sw11). One alternation,
+        # so each hostname is matched in a single pass; the full form is
+        # tried first.
         self.pattern = re.compile(
-            rf'^({dc_pattern})({pos_pattern})({type_pattern})(\d{{2}})$',
+            rf'^(?:(?P<dc>{dc_pattern})(?P<pos>{pos_pattern})(?P<type>{type_pattern})(?P<n>\d{{2}})'
+            rf'|(?P<short_type>{type_pattern})(?P<short_n>\d{{2}}))$',
             re.IGNORECASE
         )
         
-        # Also support TYPE+COUNT format for flexibility (e.g., sr01, sw11)
-        self.type_count_pattern = re.compile(
-            rf'^({type_pattern})(\d{{2}})$',
-            re.IGNORECASE
-        )
+        # Layout, HA pair detection and hover text all parse the same names;
+        # memoize per instance (callers must not modify the returned dicts)
+        self.parse = lru_cache(maxsize=None)(self.parse)
     
     def parse(self, hostname: str) -> Dict:
         """
@@ -83,15 +88,14 @@ class EnhancedHostnameParser:
         """
         hostname_clean = hostname.strip().lower()
         
-        # Try full pattern first
         match = self.pattern.match(hostname_clean)
         
-        if match:
-            datacenter, position, dev_type, counter = match.groups()
+        if match and match.group('dc') is not None:
+            datacenter, position, dev_type, counter = match.group('dc', 'pos', 'type', 'n')
             
             z_level = get_z_layer(position)
             lane = get_lane(position)
-            lane_x = get_lane_x_position(lane)
+            lane_x = LANE_X_POSITIONS[lane]
             icon_config = get_icon_config(dev_type)
             
             return {
@@ -108,10 +112,9 @@ class EnhancedHostnameParser:
                 'parse_method': 'full'
             }
         
-        # Try type+count pattern (fallback for simple hostnames)
-        match = self.type_count_pattern.match(hostname_clean)
+        # Type+count form (fallback for simple hostnames)
         if match:
-            dev_type, counter = match.groups()
+            dev_type, counter = match.group('short_type', 'short_n')
             
             return {
                 'hostname': hostname,
@@ -207,6 +210,25 @@ class EnhancedHostnameParser:
         pairs = []
         hostnames_sorted = sorted(hostnames)
         
+        if HA_PAIR_BUCKETING:
+            # Only names sharing datacenter+position+type can pair, so
+            # compare within those groups instead of across all names
+            groups = {}
+            for rank, hostname in enumerate(hostnames_sorted):
+                parsed = self.parse(hostname)
+                if parsed['valid']:
+                    key = (parsed['datacenter'], parsed['position'], parsed['type'])
+                    groups.setdefault(key, []).append((rank, hostname, parsed['counter']))
+            
+            ranked = []
+            for group in groups.values():
+                for i, (r1, h1, c1) in enumerate(group):
+                    ranked.extend((r1, r2, h1, h2) for r2, h2, c2 in group[i+1:] if c2 != c1)
+            
+            # Same order as the pairwise scan below
+            ranked.sort()
+            return [(h1, h2) for _, _, h1, h2 in ranked]
+        
         for i, h1 in enumerate(hostnames_sorted):
             for h2 in hostnames_sorted[i+1:]:
                 if self.are_ha_pair(h1, h2):
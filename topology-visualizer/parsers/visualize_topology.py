@@ -202,7 +202,11 @@ class NetworkTopologyVisualizer:
             plot_bgcolor='white'
         )
         
-        fig.write_html(output_file)
+        fig.write_html(
+            output_file,
+            include_plotlyjs='cdn',
+            full_html=True
+        )
         print(f"✓ Physical topology visualization saved to {output_file}")
     
     def visualize_hsrp_topology(self, output_file: str):
@@ -264,7 +268,11 @@ class NetworkTopologyVisualizer:
             plot_bgcolor='white'
         )
         
-        fig.write_html(output_file)
+        fig.write_html(
+            output_file,
+            include_plotlyjs='cdn',
+            full_html=True
+        )
         print(f"✓ HSRP topology visualization saved to {output_file}")
     
     def visualize_bgp_topology(self, output_file: str):
@@ -350,7 +358,11 @@ class NetworkTopologyVisualizer:
             plot_bgcolor='white'
         )
         
-        fig.write_html(output_file)
+        fig.write_html(
+            output_file,
+            include_plotlyjs='cdn',
+            full_html=True
+        )
         print(f"✓ BGP topology visualization saved to {output_file}")
     
     def visualize_combined_topology(self, output_file: str):
@@ -460,7 +472,11 @@ class NetworkTopologyVisualizer:
             plot_bgcolor='white'
         )
         
-        fig.write_html(output_file)
+        fig.write_html(
+            output_file,
+            include_plotlyjs='cdn',
+            full_html=True
+        )
         print(f"✓ Combined topology visualization saved to {output_file}")
     
     def generate_topology_summary(self, output_file: str):